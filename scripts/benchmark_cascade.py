@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.model_selection import train_test_split
+
+from src import config
+from src import sentiment_analysis
+from src import sentiment_cascade
+from src.sentiment_cache import SentimentCache
+
+SAMPLE_SIZE = 1000
+
+def run_benchmark(threshold):
+    # Train on cached RoBERTa labels, then time cascade vs. all-RoBERTa on held-out texts
+    with SentimentCache(config.SENTIMENT_MODEL, sentiment_analysis.model_revision(), config.SENTIMENT_BACKEND) as cache:
+        pairs = sentiment_analysis.cascade_training_pairs(cache, [])
+    if len(pairs) < config.CASCADE_MIN_TRAINING_SIZE:
+        print(f"Only {len(pairs)} cached RoBERTa labels. Run the pipeline once without the cascade first.")
+        return
+    texts, labels = zip(*pairs)
+    train_texts, test_texts, train_labels, _ = train_test_split(list(texts), list(labels), test_size=0.2, random_state=42)
+    model = sentiment_cascade.train_cascade(train_texts, train_labels)
+    test_texts = test_texts[:SAMPLE_SIZE]
+
+    classifier = sentiment_analysis.load_model()
+    print(f"Comparing cascade (margin < {threshold} routed) against all-RoBERTa on {len(test_texts)} documents...")
+    report = sentiment_cascade.compare_with_baseline(
+        model, test_texts, lambda batch: sentiment_analysis.classify_texts(classifier, batch), threshold)
+    for name, value in report.items():
+        print(f"{name:>22}: {value:.4f}" if isinstance(value, float) else f"{name:>22}: {value}")
+
+if __name__ == "__main__":
+    run_benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else config.CASCADE_MARGIN_THRESHOLD)
@@ -0,0 +1,45 @@
+import os
+import sys
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import data_loader
+from src import preprocessing
+
+REPEAT = 20
+
+def legacy_cleaning(contents):
+    cleaning = contents.apply(preprocessing.remove_punctuation)
+    cleaning = cleaning.apply(preprocessing.remove_number)
+    cleaning = cleaning.apply(preprocessing.remove_single_char)
+    cleaning = cleaning.apply(preprocessing.remove_multiple_whitespace)
+    return cleaning.tolist(), cleaning.apply(preprocessing.case_folding).tolist()
+
+def fused_cleaning(contents):
+    cleaned = [preprocessing.clean_text(text) for text in contents]
+    return cleaned, [text.lower() for text in cleaned]
+
+def run_benchmark():
+    df = data_loader.load_and_merge_data()
+    contents = pd.concat([df['content']] * REPEAT, ignore_index=True)
+    print(f"Benchmarking cleaning on {len(contents)} documents...")
+
+    start = time.perf_counter()
+    legacy = legacy_cleaning(contents)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fused = fused_cleaning(contents)
+    fused_time = time.perf_counter() - start
+
+    if legacy != fused:
+        raise AssertionError("Fused cleaner output differs from the legacy cleaning chain")
+
+    print(f"Legacy chain : {legacy_time:.3f}s ({len(contents) / legacy_time:,.0f} docs/sec)")
+    print(f"Fused cleaner: {fused_time:.3f}s ({len(contents) / fused_time:,.0f} docs/sec)")
+    print(f"Speedup      : {legacy_time / fused_time:.2f}x (outputs identical)")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import config
+from src import data_loader
+from src import preprocessing
+from src import sentiment_analysis
+
+SAMPLE_SIZE = 2000
+
+def run_benchmark():
+    df = data_loader.load_and_merge_data()
+    df = preprocessing.preprocess_dataframe(df.sample(n=min(SAMPLE_SIZE, len(df)), random_state=42))
+    texts = [t for t in df["hasil normalisasi"].tolist() if isinstance(t, str) and t.strip() != ""]
+    classifier = sentiment_analysis.load_model()
+    print(f"Benchmarking sentiment inference on {len(texts)} documents...")
+
+    start = time.perf_counter()
+    baseline = [classifier(text, truncation=True, max_length=config.SENTIMENT_MAX_LENGTH)[0] for text in texts]
+    baseline_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = sentiment_analysis.classify_texts(classifier, texts)
+    batched_time = time.perf_counter() - start
+
+    agreement = sum(a["label"] == b["label"] for a, b in zip(baseline, batched)) / len(texts)
+    max_delta = max(abs(a["score"] - b["score"]) for a, b in zip(baseline, batched))
+
+    print(f"Per-example : {baseline_time:.2f}s ({len(texts) / baseline_time:,.1f} docs/sec)")
+    print(f"Bucketed    : {batched_time:.2f}s ({len(texts) / batched_time:,.1f} docs/sec, batch_size={config.SENTIMENT_BATCH_SIZE})")
+    print(f"Speedup     : {baseline_time / batched_time:.2f}x")
+    print(f"Label agreement: {agreement:.2%}, max score delta: {max_delta:.2e}")
+
+if __name__ == "__main__":
+    run_benchmark()
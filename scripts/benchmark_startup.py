@@ -0,0 +1,53 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+REPEATS = 5
+
+# What each invocation has to import before any work starts
+TARGETS = {
+    "src.main (preprocess-only startup)": "import src.main",
+    "src.preprocessing": "import src.preprocessing",
+    "src.sentiment_analysis": "import src.sentiment_analysis",
+    "src.visualization": "import src.visualization",
+    "src.topic_modeling": "import src.topic_modeling",
+}
+
+def time_import(statement):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", statement], cwd=ROOT, capture_output=True, text=True)
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1]
+    return statistics.median(timings), None
+
+def slowest_imports(statement, top=10):
+    # -X importtime reports per-module cumulative import time (in us) on stderr
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    # Only top-level packages, so nested modules are not counted twice
+    rows = [(us, name) for us, name in rows if not name.startswith(" ")]
+    return sorted(rows, reverse=True)[:top]
+
+def run_benchmark():
+    print(f"Median wall-clock of a fresh interpreter importing each module ({REPEATS} runs):")
+    for label, statement in TARGETS.items():
+        seconds, error = time_import(statement)
+        print(f"{label:>36}: " + (f"{seconds:.2f}s" if error is None else f"failed ({error})"))
+    print("\nSlowest imports for src.main:")
+    for us, name in slowest_imports("import src.main"):
+        print(f"{name:>36}: {us / 1e6:.3f}s")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,22 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import data_loader
+from src import preprocessing
+from src import sentiment_analysis
+
+SAMPLE_SIZE = 2000
+
+def run_parity_check(backend):
+    df = data_loader.load_and_merge_data()
+    df = preprocessing.preprocess_dataframe(df.sample(n=min(SAMPLE_SIZE, len(df)), random_state=42))
+    texts = [t for t in df["hasil normalisasi"].tolist() if isinstance(t, str) and t.strip() != ""]
+    print(f"Comparing '{backend}' against 'pytorch' on {len(texts)} documents...")
+    report = sentiment_analysis.compare_backends(texts, backend)
+    for name, value in report.items():
+        print(f"{name:>24}: {value:.4f}" if isinstance(value, float) else f"{name:>24}: {value}")
+
+if __name__ == "__main__":
+    run_parity_check(sys.argv[1] if len(sys.argv) > 1 else "onnx-int8")
@@ -0,0 +1,12 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import config
+from src import sentiment_cascade
+
+if __name__ == "__main__":
+    # Fetch ahead of time, e.g. before running the cascade on a machine without network access
+    sentiment_cascade.fetch_lexicon()
+    print(f"InSet lexicon: {len(sentiment_cascade.load_lexicon())} words in {config.INSET_LEXICON_DIR}")
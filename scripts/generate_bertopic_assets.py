@@ -3,11 +3,21 @@ from bertopic import BERTopic
 from sentence_transformers import SentenceTransformer
 import plotly.express as px
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import config
+from src import topic_modeling
+from src.embedding_store import embed_texts
+from src.topic_assigner import export_artifact
+from src.topic_visualization import documents_figure
 
 # Paths
 DATA_PATH = "models/BERTopic-CoreTax-data.csv"
 OUTPUT_ASSETS_DIR = "streamlit_app/assets"
 MODEL_DIR = "models/bertopic_model"
+ASSIGNER_DIR = "models/bertopic_model_assigner"
 
 def generate_assets():
     print("Loading data...")
@@ -22,20 +32,32 @@ def generate_assets():
     neg_data = df[df['sentiment'] == 'negative']
     texts = neg_data['text'].fillna('').tolist()
     
-    print(f"Training BERTopic on {len(texts)} negative comments...")
-    
-    embedding_model = SentenceTransformer("distiluse-base-multilingual-cased-v2")
-    topic_model = BERTopic(
-        language="indonesian",
-        embedding_model=embedding_model,
-        n_gram_range=(1, 2),
-        min_topic_size=15 # Slightly lower to ensure we get topics
-    )
+    embedding_model = SentenceTransformer(config.EMBEDDING_MODEL)
+    # Embeddings come from the shared store, so texts embedded by the pipeline are not re-encoded
+    embeddings = embed_texts(texts, embedding_model)
     
-    topics, probs = topic_model.fit_transform(texts)
+    if config.TOPIC_ONLINE:
+        # Fold only unseen comments into the pipeline's online model instead of refitting
+        topic_model = topic_modeling.update_online_model(texts, embedding_model)
+        if topic_model is None:
+            print("No online topic model yet. Nothing to generate.")
+            return
+        # An online model's topics_ only covers its last batch; assign every comment
+        topic_model.topics_, _ = topic_model.transform(texts, embeddings=embeddings)
+    else:
+        print(f"Training BERTopic on {len(texts)} negative comments...")
+        topic_model = BERTopic(
+            language="indonesian",
+            embedding_model=embedding_model,
+            n_gram_range=(1, 2),
+            min_topic_size=15 # Slightly lower to ensure we get topics
+        )
+        topics, probs = topic_model.fit_transform(texts, embeddings=embeddings)
+        
+        print("Saving model...")
+        topic_model.save(MODEL_DIR)
     
-    print("Saving model...")
-    topic_model.save(MODEL_DIR)
+    assigner = export_artifact(topic_model, embeddings, topic_model.topics_, ASSIGNER_DIR)
     
     print("Generating visualizations...")
     # 1. Topics
@@ -55,28 +77,26 @@ def generate_assets():
     # fig_heatmap.write_html(os.path.join(OUTPUT_ASSETS_DIR, "heatmap.html"))
     
     # 5. Documents (Sample)
-    # visualize_documents is heavy. We'll try it on a subset if it's too large, but 2k-3k is fine.
-    # We need the embeddings for this.
-    # print("Generating document visualization (this might take a moment)...")
-    # embeddings = embedding_model.encode(texts, show_progress_bar=True)
-    # fig_docs = topic_model.visualize_documents(texts, embeddings=embeddings)
-    # fig_docs.write_html(os.path.join(OUTPUT_ASSETS_DIR, "documents.html"))
+    # Stratified per-topic sample projected with a cached 2-D UMAP of the stored
+    # embeddings, so this stays fast for large corpora.
+    print("Generating document visualization...")
+    fig_docs = documents_figure(topic_model, texts, topic_model.topics_, embeddings)
+    fig_docs.write_html(os.path.join(OUTPUT_ASSETS_DIR, "documents.html"))
     
     # 6. Sentiment Confusion Matrix (Topic vs Sentiment)
     print("Generating Sentiment Confusion Matrix...")
     # Predict topics for ALL data to see distribution
     # We use the full dataframe 'df' loaded at the beginning
     all_texts = df['text'].fillna('').tolist()
-    # We need to transform the texts to get their topics based on the trained model
-    # Note: This might take a bit of time for large datasets
-    all_topics, _ = topic_model.transform(all_texts, embeddings=embedding_model.encode(all_texts, show_progress_bar=False))
+    # Nearest topic centroid by cosine similarity over the stored embeddings:
+    # a batched matrix product instead of a full topic_model.transform. Texts
+    # below the fitted similarity cutoff keep the -1 outlier row of the matrix.
+    all_topics = assigner.assign(embed_texts(all_texts, embedding_model), min_similarity=assigner.min_similarity)
     
     df['topic'] = all_topics
     
     # Get topic info to map IDs to names
-    topic_info = topic_model.get_topic_info()
-    topic_map = dict(zip(topic_info['Topic'], topic_info['Name']))
-    df['topic_name'] = df['topic'].map(topic_map)
+    df['topic_name'] = df['topic'].map(assigner.topic_names())
     
     # Create crosstab
     if 'sentiment' in df.columns:
@@ -0,0 +1,128 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from . import config
+from .embedding_store import embed_texts
+
+INDEX_FILE = "index.bin"
+DOCUMENTS_FILE = "documents.csv"
+META_FILE = "meta.json"
+# Metadata kept next to each indexed text for display
+DOCUMENT_COLUMNS = ["text", "sentiment", "source"]
+
+def _import_hnswlib():
+    try:
+        import hnswlib
+    except ImportError as e:
+        raise ImportError("The similarity index needs hnswlib: pip install hnswlib") from e
+    return hnswlib
+
+def _read_meta(index_dir):
+    try:
+        with open(os.path.join(index_dir, META_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def update_index(df, embedding_model, index_dir=config.ANN_INDEX_DIR):
+    """
+    Adds every distinct 'hasil normalisasi' text of df that is not indexed yet
+    to the HNSW index (cosine) in index_dir, creating it on first use and
+    rebuilding it when the embedding model changes. Returns the indexed count.
+    """
+    hnswlib = _import_hnswlib()
+    documents = (df.assign(text=df["hasil normalisasi"])
+                 .reindex(columns=DOCUMENT_COLUMNS)
+                 .dropna(subset=["text"]))
+    documents = documents[documents["text"].str.strip() != ""].drop_duplicates("text")
+
+    meta = _read_meta(index_dir)
+    index_path = os.path.join(index_dir, INDEX_FILE)
+    documents_path = os.path.join(index_dir, DOCUMENTS_FILE)
+    if meta is not None and meta["model"] == config.EMBEDDING_MODEL and os.path.exists(index_path):
+        indexed = pd.read_csv(documents_path, keep_default_na=False)
+        index = hnswlib.Index(space="cosine", dim=meta["dim"])
+        index.load_index(index_path, max_elements=meta["count"])
+    else:
+        indexed = pd.DataFrame(columns=DOCUMENT_COLUMNS)
+        index = None
+
+    new_documents = documents[~documents["text"].isin(set(indexed["text"]))]
+    if new_documents.empty:
+        print(f"Similarity index up to date ({len(indexed)} texts).")
+        return len(indexed)
+
+    print(f"Adding {len(new_documents)} texts to the similarity index...")
+    embeddings = embed_texts(new_documents["text"].tolist(), embedding_model)
+    count = len(indexed) + len(new_documents)
+    if index is None:
+        index = hnswlib.Index(space="cosine", dim=embeddings.shape[1])
+        index.init_index(max_elements=count, ef_construction=config.ANN_EF_CONSTRUCTION, M=config.ANN_M)
+    else:
+        index.resize_index(count)
+    # Labels are row positions in documents.csv
+    index.add_items(embeddings, np.arange(len(indexed), count))
+
+    # Every file is written to a temp path and swapped in, meta.json last, so an
+    # interrupted update never leaves meta, index and documents out of step
+    os.makedirs(index_dir, exist_ok=True)
+    index.save_index(index_path + ".tmp")
+    os.replace(index_path + ".tmp", index_path)
+    pd.concat([indexed, new_documents], ignore_index=True).to_csv(documents_path + ".tmp", index=False)
+    os.replace(documents_path + ".tmp", documents_path)
+    meta_path = os.path.join(index_dir, META_FILE)
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"model": config.EMBEDDING_MODEL, "dim": int(embeddings.shape[1]), "count": count}, f)
+    os.replace(meta_path + ".tmp", meta_path)
+    return count
+
+class SimilarityIndex:
+    """Read side of the persisted HNSW index: "more like this" and free-text search."""
+
+    def __init__(self, index_dir=config.ANN_INDEX_DIR):
+        hnswlib = _import_hnswlib()
+        self.meta = _read_meta(index_dir)
+        if self.meta is None:
+            raise FileNotFoundError(f"No similarity index in {index_dir}. Run the topic modeling stage first.")
+        self.documents = pd.read_csv(os.path.join(index_dir, DOCUMENTS_FILE), keep_default_na=False)
+        self.row_of_text = {text: row for row, text in enumerate(self.documents["text"])}
+        self.index = hnswlib.Index(space="cosine", dim=self.meta["dim"])
+        self.index.load_index(os.path.join(index_dir, INDEX_FILE))
+        # Higher ef trades query latency for recall
+        self.index.set_ef(config.ANN_EF_SEARCH)
+        # Loaded on the first free-text search only
+        self.encoder = None
+        self.kamus_tidak_baku = None
+
+    def __len__(self):
+        return len(self.documents)
+
+    def _results(self, labels, distances, exclude=None):
+        keep = labels != exclude if exclude is not None else np.ones(len(labels), dtype=bool)
+        results = self.documents.iloc[labels[keep].astype(np.int64)].copy()
+        results["similarity"] = 1 - distances[keep]
+        return results.reset_index(drop=True)
+
+    def search_vector(self, embedding, k=10, exclude=None):
+        # One extra neighbour in case the excluded row is among the results
+        query_k = min(k + (exclude is not None), len(self))
+        labels, distances = self.index.knn_query(np.asarray(embedding, dtype=np.float32).reshape(1, -1), k=query_k)
+        return self._results(labels[0], distances[0], exclude).head(k)
+
+    def more_like(self, text, k=10):
+        """Nearest indexed texts to an indexed text, reusing its stored vector (no encoding)."""
+        row = self.row_of_text.get(text)
+        if row is None:
+            raise KeyError("Text is not in the similarity index")
+        return self.search_vector(self.index.get_items([row])[0], k, exclude=row)
+
+    def search(self, query, k=10):
+        """Free-text search: the query is normalized like the corpus, then embedded."""
+        from . import preprocessing
+        if self.encoder is None:
+            from sentence_transformers import SentenceTransformer
+            self.encoder = SentenceTransformer(self.meta["model"])
+            self.kamus_tidak_baku = preprocessing.load_kamus_baku()
+        query = preprocessing.normalize_text(query, self.kamus_tidak_baku)
+        return self.search_vector(self.encoder.encode([query], show_progress_bar=False)[0], k)
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import sqlite3
+
+# SQLite limits the number of bound parameters per statement
+LOOKUP_CHUNK_SIZE = 900
+
+def text_key(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class SqliteCache:
+    """
+    Persistent key -> value(s) table in SQLite. The whole table is cleared
+    whenever `fingerprint` differs from the one it was filled under.
+    """
+    name = "Cache"
+    table = "entries"
+    key_column = "key"
+    # (column, SQLite type) pairs; lookups return a scalar for a single column, else a tuple
+    value_columns = [("value", "TEXT")]
+
+    def __init__(self, path, fingerprint):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path)
+        columns = ", ".join(f"{column} {sql_type} NOT NULL" for column, sql_type in self.value_columns)
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({self.key_column} TEXT PRIMARY KEY, {columns})")
+        self._check_fingerprint(fingerprint)
+
+    def _check_fingerprint(self, fingerprint):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        if row is not None and row[0] == fingerprint:
+            return
+        if row is not None:
+            print(f"{self.name}: fingerprint changed. Invalidating cache.")
+        with self.conn:
+            self.conn.execute(f"DELETE FROM {self.table}")
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)", (fingerprint,))
+
+    def lookup(self, keys):
+        value_names = ", ".join(column for column, _ in self.value_columns)
+        single = len(self.value_columns) == 1
+        found = {}
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT {self.key_column}, {value_names} FROM {self.table} WHERE {self.key_column} IN ({placeholders})", chunk)
+            for row in rows:
+                found[row[0]] = row[1] if single else tuple(row[1:])
+        return found
+
+    def store(self, entries):
+        single = len(self.value_columns) == 1
+        placeholders = ", ".join("?" * (len(self.value_columns) + 1))
+        rows = ((key, value) if single else (key, *value) for key, value in entries.items())
+        with self.conn:
+            self.conn.executemany(f"INSERT OR REPLACE INTO {self.table} VALUES ({placeholders})", rows)
+
+    def get_or_compute(self, keys, compute_missing):
+        """
+        Returns a key -> value dict for `keys`. Keys absent from the cache are
+        passed as a list to `compute_missing`, which must return their values as a dict.
+        """
+        keys = list(keys)
+        found = self.lookup(keys)
+        missing = [key for key in keys if key not in found]
+        self.hits += len(found)
+        self.misses += len(missing)
+        if missing:
+            computed = compute_missing(missing)
+            self.store(computed)
+            found.update(computed)
+        return found
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"{self.name}: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%} hit rate)")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
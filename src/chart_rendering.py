@@ -0,0 +1,99 @@
+import hashlib
+import inspect
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+from . import config
+from .cache_utils import SqliteCache
+
+# Seaborn style every chart is drawn with, applied before each draw so the
+# output never depends on what an earlier chart in the same worker changed
+CHART_STYLE = "whitegrid"
+
+def plotting_fingerprint():
+    """Installed versions of the plotting libraries; an upgrade redraws every chart."""
+    versions = []
+    for package in ("matplotlib", "seaborn", "wordcloud"):
+        try:
+            versions.append(f"{package}={metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            versions.append(f"{package}=unknown")
+    return "|".join(versions)
+
+class ChartHashes(SqliteCache):
+    """Content hash each chart in outputs/ was last drawn from."""
+    name = "Chart cache"
+    table = "charts"
+    key_column = "path"
+    value_columns = [("content_hash", "TEXT")]
+
+    def __init__(self, path=config.CHART_HASH_FILE):
+        super().__init__(path, plotting_fingerprint())
+
+def content_hash(draw, data):
+    """Hash of a chart's aggregated input data and of the code that draws it."""
+    digest = hashlib.sha256(f"{CHART_STYLE}|{inspect.getsource(draw)}".encode("utf-8"))
+    digest.update(json.dumps(data, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+def _render_chart(task):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    draw, data, path = task
+    matplotlib.rcdefaults()
+    sns.set_style(CHART_STYLE)
+    try:
+        fig = draw(data)
+    except Exception as e:
+        plt.close("all")
+        return path, str(e)
+    try:
+        fig.savefig(path)
+    finally:
+        # Figures are closed explicitly so a long-lived worker does not accumulate them
+        plt.close(fig)
+    return path, None
+
+def render_charts(charts, output_dir=config.OUTPUTS_DIR, workers=config.CHART_WORKERS, force=False):
+    """
+    Renders (file name, draw function, data) charts into output_dir. draw(data)
+    must return a matplotlib figure; data should hold the aggregated values the
+    chart shows, not the raw frame. Charts whose file exists and whose content
+    hash is unchanged since they were drawn are skipped unless force is set.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with ChartHashes() as hashes:
+        paths = {file_name: os.path.join(output_dir, file_name) for file_name, _, _ in charts}
+        stored = hashes.lookup(list(paths.values()))
+        tasks, new_hashes = [], {}
+        for file_name, draw, data in charts:
+            path = paths[file_name]
+            digest = content_hash(draw, data)
+            if not force and stored.get(path) == digest and os.path.exists(path):
+                print(f"  {file_name}: unchanged, skipped")
+                continue
+            tasks.append((draw, data, path))
+            new_hashes[path] = digest
+
+        if not tasks:
+            return
+        print(f"Rendering {len(tasks)} charts with {min(workers, len(tasks))} workers...")
+        if workers > 1 and len(tasks) > 1:
+            # spawn rather than fork: the sentiment stage may have started torch's thread pools here
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                     mp_context=multiprocessing.get_context("spawn")) as executor:
+                results = list(executor.map(_render_chart, tasks))
+        else:
+            results = [_render_chart(task) for task in tasks]
+
+        for path, error in results:
+            if error is None:
+                hashes.store({path: new_hashes[path]})
+                print(f"  {os.path.basename(path)}: {path}")
+            else:
+                print(f"  {os.path.basename(path)}: failed ({error})")
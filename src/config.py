@@ -6,16 +6,124 @@ DATA_DIR = os.path.join(BASE_DIR, 'data')
 PROCESSED_DATA_DIR = os.path.join(DATA_DIR, 'processed')
 MODELS_DIR = os.path.join(BASE_DIR, 'models')
 OUTPUTS_DIR = os.path.join(BASE_DIR, 'outputs')
+CACHE_DIR = os.path.join(DATA_DIR, 'cache')
 
 # Input Files (Mapped to available files in data/)
 FILE_PLAYSTORE = os.path.join(DATA_DIR, 'Data-Scrape-PlayStore.csv') 
 FILE_YOUTUBE = os.path.join(DATA_DIR, 'Data-Scrape-YouTube.csv')
 FILE_TWITTER_TIKTOK = os.path.join(DATA_DIR, 'Data-Combined-Twitter-Tiktok.csv')
 
+# Raw scrape exports (loaded directly by the source adapters in data_loader)
+FILE_TWITTER_RAW = os.path.join(DATA_DIR, 'Data-Scrape-Twitter.csv')
+FILE_TIKTOK_RAW = os.path.join(DATA_DIR, 'Data-Scrape-Tiktok.csv')
+FILE_TIKTOK_VIDEO_RAW = os.path.join(DATA_DIR, 'TiktokVideo-01.csv')
+
 # Auxiliary Files
 KAMUS_BAKU_FILE = os.path.join(DATA_DIR, 'kamuskatabaku.xlsx')
+KAMUS_BAKU_CACHE_FILE = os.path.join(DATA_DIR, 'kamuskatabaku.compiled.json')
 
 # Output Files
 OUTPUT_PREPROCESSED_CSV = os.path.join(PROCESSED_DATA_DIR, 'CoreTax Preprocessing Results.csv')
+# Written by `python -m src.main --stages preprocess` (no sentiment columns)
+OUTPUT_PREPROCESSING_ONLY_CSV = os.path.join(PROCESSED_DATA_DIR, 'CoreTax Preprocessing Only.csv')
 OUTPUT_BERTOPIC_CSV = os.path.join(PROCESSED_DATA_DIR, 'BERTopic-CoreTax-data.csv')
 OUTPUT_BERTOPIC_MODEL = os.path.join(MODELS_DIR, 'bertopic_coretax_model')
+WATERMARKS_FILE = os.path.join(PROCESSED_DATA_DIR, 'ingest_watermarks.json')
+OUTPUT_TOPIC_SWEEP_CSV = os.path.join(OUTPUTS_DIR, 'topic_sweep.csv')
+
+# Sentiment Model
+SENTIMENT_MODEL = "w11wo/indonesian-roberta-base-sentiment-classifier"
+SENTIMENT_BATCH_SIZE = 32
+# RoBERTa's position limit; longer texts are truncated
+SENTIMENT_MAX_LENGTH = 512
+# Inference backend: 'pytorch', 'onnx' (ONNX Runtime) or 'onnx-int8' (dynamically quantized ONNX)
+SENTIMENT_BACKEND = 'pytorch'
+ONNX_MODELS_DIR = os.path.join(MODELS_DIR, 'onnx')
+# Port of the local scoring service (python -m src.scoring_service)
+SCORING_SERVICE_PORT = 8765
+# Processes for sentiment inference; each loads its own model copy
+SENTIMENT_WORKERS = 1
+# Cascade: a lexicon + TF-IDF linear model trained on earlier RoBERTa labels
+# labels confident texts; only texts whose top-two probability margin is
+# below the threshold are sent to RoBERTa
+SENTIMENT_CASCADE = False
+CASCADE_MARGIN_THRESHOLD = 0.5
+# Fewer cached RoBERTa labels than this and the cascade is skipped
+CASCADE_MIN_TRAINING_SIZE = 500
+# InSet lexicon (positive.tsv / negative.tsv with word<TAB>weight rows),
+# downloaded from INSET_LEXICON_URL on first use or by scripts/fetch_inset_lexicon.py
+INSET_LEXICON_DIR = os.path.join(DATA_DIR, 'inset')
+INSET_LEXICON_URL = "https://raw.githubusercontent.com/fajri91/InSet/master/"
+
+# Topic Modeling
+EMBEDDING_MODEL = "distiluse-base-multilingual-cased-v2"
+TOPIC_MIN_TOPIC_SIZE = 20
+# Centroid / c-TF-IDF export used by topic_assigner.TopicAssigner
+TOPIC_ARTIFACT_DIR = os.path.join(MODELS_DIR, 'topic_assigner')
+TOPIC_ASSIGN_BATCH_SIZE = 4096
+# BERTopic HTML figures (topic_html stage), written where the dashboard reads them
+TOPIC_HTML_DIR = os.path.join(BASE_DIR, 'streamlit_app', 'assets')
+# Each worker holds its own copy of the model
+TOPIC_HTML_WORKERS = 2
+# documents.html: stratified per-topic sample projected with a cached 2-D UMAP
+TOPIC_DOCUMENTS_SAMPLE = 5000
+TOPIC_DOCUMENTS_MIN_PER_TOPIC = 20
+# Online mode partial_fits only unseen texts into the saved model
+# (IncrementalPCA + MiniBatchKMeans + OnlineCountVectorizer) instead of
+# refitting UMAP/HDBSCAN on the whole history; topic ids stay stable
+TOPIC_ONLINE = False
+TOPIC_ONLINE_CLUSTERS = 20
+TOPIC_ONLINE_COMPONENTS = 5
+# Per-batch decay of earlier word counts in the online c-TF-IDF
+TOPIC_ONLINE_DECAY = 0.01
+TOPIC_ONLINE_BATCH_SIZE = 1000
+# HNSW similarity index over every comment embedding, built by the topic stage
+# and used for "more like this" / free-text search in the dashboard
+BUILD_ANN_INDEX = True
+ANN_INDEX_DIR = os.path.join(MODELS_DIR, 'ann_index')
+ANN_M = 16
+ANN_EF_CONSTRUCTION = 200
+ANN_EF_SEARCH = 64
+# Hyperparameter sweep (python -m src.topic_sweep): one cached UMAP reduction per
+# (n_neighbors, n_components), then every clustering combination is evaluated
+SWEEP_UMAP_NEIGHBORS = [15]
+SWEEP_UMAP_COMPONENTS = [5]
+SWEEP_MIN_TOPIC_SIZES = [10, 15, 20, 30]
+SWEEP_MIN_SAMPLES = [None, 5, 10]
+SWEEP_NGRAM_RANGES = [(1, 1), (1, 2)]
+# Top words per topic scored by the NPMI coherence
+SWEEP_COHERENCE_TOP_N = 10
+SWEEP_WORKERS = 4
+
+# Pipeline Options
+# Lean mode keeps only 'hasil normalisasi' as text and stores stemmed tokens as
+# interned int32 ids, trading the intermediate preprocessing columns for memory.
+LEAN_MODE = False
+# Load the raw per-platform exports through the source adapters instead of
+# the hand-merged Data-Combined-Twitter-Tiktok.csv
+USE_RAW_SOURCES = False
+# Only push rows newer than each source's watermark through preprocessing and
+# sentiment, appending them to OUTPUT_PREPROCESSED_CSV (uses the source adapters)
+INCREMENTAL = False
+# Print df.info(), null counts and duplicate count after loading the corpus
+SHOW_DATA_DIAGNOSTICS = False
+# Also cluster near-duplicates (MinHash/LSH) so they share one sentiment pass
+NEAR_DUPLICATES = False
+NEAR_DUPLICATE_THRESHOLD = 0.8
+# Rows per chunk when streaming the corpus through preprocessing
+STREAM_CHUNK_SIZE = 50000
+# Preprocess-only runs stream the merged corpus chunk by chunk into
+# OUTPUT_PREPROCESSING_ONLY_CSV instead of holding it in memory (also --stream)
+STREAM_PREPROCESSING = False
+# Processes drawing the static charts of the visualize stage (Agg backend)
+CHART_WORKERS = 2
+
+# Cache Files
+STEM_CACHE_FILE = os.path.join(CACHE_DIR, 'sastrawi_stems.sqlite')
+SENTIMENT_CACHE_FILE = os.path.join(CACHE_DIR, 'sentiment_results.sqlite')
+# One float32 matrix + text-hash index per embedding model
+EMBEDDINGS_DIR = os.path.join(CACHE_DIR, 'embeddings')
+# Texts already folded into the online topic model
+TOPIC_LEDGER_FILE = os.path.join(CACHE_DIR, 'topic_ledger.sqlite')
+# Content hash each chart in outputs/ was drawn from; unchanged charts are skipped
+CHART_HASH_FILE = os.path.join(CACHE_DIR, 'chart_hashes.sqlite')
@@ -1,62 +1,235 @@
+import glob
+import hashlib
 import pandas as pd
 import os
+from concurrent.futures import ThreadPoolExecutor
 from . import config
+from .cache_utils import file_sha256
 
-def load_and_merge_data():
+# (path, columns of the empty placeholder used when the file is missing,
+#  candidate text columns renamed to 'content' in order of preference)
+SOURCES = [
+    # Play Store: has 'content', 'at' (date), 'rating', 'source'
+    (config.FILE_PLAYSTORE, ['source', 'content'], ['text']),
+    # YouTube: has 'text', 'date', 'source'
+    (config.FILE_YOUTUBE, ['source', 'text'], ['text']),
+    # Twitter/TikTok: has 'cleaned_text', 'sentiment', 'sentiment_score', 'source'
+    (config.FILE_TWITTER_TIKTOK, ['source', 'cleaned_text'], ['cleaned_text', 'text']),
+]
+
+# Columns dropped after merging
+COLUMNS_TO_DROP = ['rating', 'at', 'date', 'sentiment', 'sentiment_score']
+
+def _rename_content(df, text_columns):
+    # Rename columns to match 'content'
+    for column in text_columns:
+        if column in df.columns:
+            return df.rename(columns={column: 'content'})
+    return df
+
+def _read_source(path, placeholder_columns):
+    # Handle missing files gracefully
+    if os.path.exists(path):
+        return pd.read_csv(path)
+    print(f"Warning: {path} not found. Creating empty DataFrame.")
+    return pd.DataFrame(columns=placeholder_columns)
+
+# Unified schema produced by the source adapters
+UNIFIED_COLUMNS = ['id', 'created_at', 'content', 'source']
+
+class SourceAdapter:
     """
-    Loads data from Play Store, YouTube, and Social Media (Twitter/TikTok),
-    renames columns, and merges them into a single DataFrame.
+    Reads one raw scrape export with only the columns it needs and explicit
+    dtypes, and maps it onto UNIFIED_COLUMNS.
     """
-    print("Loading datasets...")
-    
-    # Load Dataframes
-    # Handle missing files gracefully
-    if os.path.exists(config.FILE_PLAYSTORE):
-        df1 = pd.read_csv(config.FILE_PLAYSTORE)
-    else:
-        print(f"Warning: {config.FILE_PLAYSTORE} not found. Creating empty DataFrame.")
-        df1 = pd.DataFrame(columns=['source', 'content'])
 
-    if os.path.exists(config.FILE_YOUTUBE):
-        df2 = pd.read_csv(config.FILE_YOUTUBE)
-    else:
-        print(f"Warning: {config.FILE_YOUTUBE} not found. Creating empty DataFrame.")
-        df2 = pd.DataFrame(columns=['source', 'text'])
+    def __init__(self, name, path, source, text_column, time_column, id_column=None,
+                 id_pattern=None, time_format=None):
+        self.name = name
+        self.path = path
+        self.source = source
+        self.text_column = text_column
+        self.time_column = time_column
+        self.id_column = id_column
+        # Regex with one group extracting a numeric id from id_column (e.g. a URL)
+        self.id_pattern = id_pattern
+        self.time_format = time_format
 
-    if os.path.exists(config.FILE_TWITTER_TIKTOK):
-        df3 = pd.read_csv(config.FILE_TWITTER_TIKTOK)
-    else:
-        print(f"Warning: {config.FILE_TWITTER_TIKTOK} not found. Creating empty DataFrame.")
-        df3 = pd.DataFrame(columns=['source', 'cleaned_text'])
+    def load(self):
+        columns = [c for c in (self.text_column, self.time_column, self.id_column) if c]
+        # utf-8-sig strips the BOM some scraper exports start with
+        raw = pd.read_csv(self.path, usecols=columns, dtype='string', encoding='utf-8-sig')
+        if self.id_column is None:
+            ids = pd.array([pd.NA] * len(raw), dtype='Int64')
+        else:
+            ids = raw[self.id_column]
+            if self.id_pattern is not None:
+                ids = ids.str.extract(self.id_pattern, expand=False)
+            ids = pd.to_numeric(ids, errors='coerce').astype('Int64')
+        return pd.DataFrame({
+            'id': ids,
+            'created_at': pd.to_datetime(raw[self.time_column], format=self.time_format, utc=True, errors='coerce'),
+            'content': raw[self.text_column],
+            'source': self.source,
+        })
 
-    # Rename columns to match 'content'
-    
-    # df1 (Play Store): has 'content', 'at' (date), 'rating', 'source'
-    # No rename needed for content, but let's be safe
-    if 'text' in df1.columns:
-        df1.rename(columns={'text': 'content'}, inplace=True)
-
-    # df2 (YouTube): has 'text', 'date', 'source'
-    if 'text' in df2.columns:
-        df2.rename(columns={'text': 'content'}, inplace=True)
-    
-    # df3 (Twitter/TikTok): has 'cleaned_text', 'sentiment', 'sentiment_score', 'source'
-    if 'cleaned_text' in df3.columns:
-        df3.rename(columns={'cleaned_text': 'content'}, inplace=True)
-    elif 'text' in df3.columns:
-         df3.rename(columns={'text': 'content'}, inplace=True)
-
-    # Merge
-    print("Merging datasets...")
-    df = pd.concat([df1, df2, df3], axis=0, ignore_index=True)
-    
+SOURCE_ADAPTERS = {}
+
+def register_adapter(adapter):
+    SOURCE_ADAPTERS[adapter.name] = adapter
+    return adapter
+
+register_adapter(SourceAdapter('play_store', config.FILE_PLAYSTORE, 'play_store',
+                               text_column='content', time_column='at', time_format='%Y-%m-%d %H:%M:%S'))
+register_adapter(SourceAdapter('youtube', config.FILE_YOUTUBE, 'youtube',
+                               text_column='text', time_column='date', time_format='%Y-%m-%d'))
+register_adapter(SourceAdapter('twitter', config.FILE_TWITTER_RAW, 'twitter',
+                               text_column='full_text', time_column='created_at', id_column='id_str',
+                               time_format='%a %b %d %H:%M:%S %z %Y'))
+register_adapter(SourceAdapter('tiktok', config.FILE_TIKTOK_RAW, 'tiktok',
+                               text_column='text', time_column='createTimeISO', id_column='cid', time_format='ISO8601'))
+register_adapter(SourceAdapter('tiktok_video', config.FILE_TIKTOK_VIDEO_RAW, 'tiktok',
+                               text_column='text', time_column='createTimeISO', id_column='webVideoUrl',
+                               id_pattern=r'/video/(\d+)', time_format='ISO8601'))
+
+def load_raw_sources(names=None):
+    """
+    Loads the registered source adapters concurrently (all of them unless
+    `names` is given) and concatenates them in registry order on UNIFIED_COLUMNS.
+    """
+    adapters = [SOURCE_ADAPTERS[name] for name in (names or SOURCE_ADAPTERS)]
+    available = []
+    for adapter in adapters:
+        if os.path.exists(adapter.path):
+            available.append(adapter)
+        else:
+            print(f"Warning: {adapter.path} not found. Skipping {adapter.name}.")
+    if not available:
+        return pd.DataFrame(columns=UNIFIED_COLUMNS)
+    with ThreadPoolExecutor(max_workers=len(available)) as executor:
+        frames = list(executor.map(lambda adapter: adapter.load(), available))
+    df = pd.concat(frames, axis=0, ignore_index=True)
+    df['source'] = pd.Categorical(df['source'], categories=sorted({a.source for a in SOURCE_ADAPTERS.values()}))
+    return df
+
+# Bump when the merge logic changes so stale caches are not reused
+MERGED_CACHE_VERSION = 1
+
+def _input_paths(raw):
+    if raw:
+        return [adapter.path for adapter in SOURCE_ADAPTERS.values()]
+    return [path for path, _, _ in SOURCES]
+
+def _sources_key(raw=False):
+    digest = hashlib.sha256(f"v{MERGED_CACHE_VERSION}-{'raw' if raw else 'merged'}".encode())
+    for path in _input_paths(raw):
+        digest.update(path.encode())
+        digest.update((file_sha256(path) if os.path.exists(path) else "missing").encode())
+    return digest.hexdigest()
+
+def _cache_mode(raw):
+    return 'raw' if raw else 'merged'
+
+def _merged_cache_path(key, raw=False):
+    # The mode is part of the name so each loader only ever prunes its own stale caches
+    return os.path.join(config.CACHE_DIR, f"merged_corpus-{_cache_mode(raw)}-{key[:16]}.parquet")
+
+def _read_merged_cache(key, raw=False):
+    path = _merged_cache_path(key, raw)
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_parquet(path)
+    except (ImportError, ValueError, OSError) as e:
+        print(f"Warning: could not read merged corpus cache ({e}). Rebuilding.")
+        return None
+
+def _write_merged_cache(key, df, raw=False):
+    os.makedirs(config.CACHE_DIR, exist_ok=True)
+    path = _merged_cache_path(key, raw)
+    try:
+        df.to_parquet(path + '.tmp', index=False)
+    except (ImportError, ValueError, TypeError) as e:
+        print(f"Warning: could not write merged corpus cache ({e}).")
+        return
+    os.replace(path + '.tmp', path)
+    for stale in glob.glob(os.path.join(config.CACHE_DIR, f'merged_corpus-{_cache_mode(raw)}-*.parquet')):
+        if stale != path:
+            os.remove(stale)
+
+def print_diagnostics(df):
     print(f"Data Info after merge:")
     print(df.info())
     print(f"Missing values:\n{df.isnull().sum()}")
     print(f"Duplicates: {df.duplicated().sum()}")
-    
-    # Drop unnecessary columns if they exist
-    cols_to_drop = ['rating', 'at', 'date', 'sentiment', 'sentiment_score']
-    df.drop(columns=[c for c in cols_to_drop if c in df.columns], inplace=True)
-    
+
+def load_and_merge_data(use_cache=True, diagnostics=False, raw=False):
+    """
+    Loads data from Play Store, YouTube, and Social Media (Twitter/TikTok),
+    renames columns, and merges them into a single DataFrame.
+
+    The merged corpus is cached as Parquet keyed on the content hashes of the
+    source files and reused while they are unchanged. The df.info()/null/
+    duplicate dump is only printed with diagnostics=True.
+
+    With raw=True the raw per-platform exports are read through
+    SOURCE_ADAPTERS instead, keeping the unified id/created_at columns.
+    """
+    key = _sources_key(raw) if use_cache else None
+    if key is not None:
+        df = _read_merged_cache(key, raw)
+        if df is not None:
+            print("Loaded merged datasets from cache.")
+            if diagnostics:
+                print_diagnostics(df)
+            return df
+
+    print("Loading datasets...")
+    if raw:
+        df = load_raw_sources()
+        if diagnostics:
+            print_diagnostics(df)
+    else:
+        frames = [_rename_content(_read_source(path, placeholder), text_columns)
+                  for path, placeholder, text_columns in SOURCES]
+
+        # Merge
+        print("Merging datasets...")
+        df = pd.concat(frames, axis=0, ignore_index=True)
+
+        if diagnostics:
+            print_diagnostics(df)
+
+        # Drop unnecessary columns if they exist
+        df.drop(columns=[c for c in COLUMNS_TO_DROP if c in df.columns], inplace=True)
+
+    if key is not None:
+        _write_merged_cache(key, df, raw)
     return df
+
+def merged_columns():
+    """Columns load_and_merge_data would produce, derived from the CSV headers only."""
+    columns = []
+    for path, placeholder, text_columns in SOURCES:
+        header = pd.read_csv(path, nrows=0) if os.path.exists(path) else pd.DataFrame(columns=placeholder)
+        for column in _rename_content(header, text_columns).columns:
+            if column not in columns:
+                columns.append(column)
+    return [c for c in columns if c not in COLUMNS_TO_DROP]
+
+def iter_merged_chunks(chunksize=config.STREAM_CHUNK_SIZE):
+    """
+    Streaming counterpart of load_and_merge_data: yields the merged corpus as
+    DataFrames of at most `chunksize` rows, with the same columns and row order.
+    """
+    columns = merged_columns()
+    offset = 0
+    for path, _, text_columns in SOURCES:
+        if not os.path.exists(path):
+            print(f"Warning: {path} not found. Skipping.")
+            continue
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            chunk = _rename_content(chunk, text_columns).reindex(columns=columns)
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
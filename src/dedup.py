@@ -0,0 +1,110 @@
+import zlib
+import numpy as np
+
+# Column holding, for every row, the position of its cluster's canonical row
+DUPLICATE_COLUMN = 'duplicate_of'
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+def exact_duplicates(texts):
+    """
+    Returns an int array where entry i is the position of the first row whose
+    text equals texts[i] (i itself for first occurrences).
+    """
+    first_seen = {}
+    return np.array([first_seen.setdefault(text, i) for i, text in enumerate(texts)], dtype=np.int64)
+
+def _shingles(text, shingle_size):
+    tokens = text.split() if isinstance(text, str) else []
+    if len(tokens) <= shingle_size:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)}
+
+def minhash_signatures(texts, num_perm=64, shingle_size=2, seed=1):
+    """
+    MinHash signatures over word shingles. Rows of texts without any shingle
+    are left at the maximum hash and flagged False in the returned mask.
+    """
+    rng = np.random.RandomState(seed)
+    # a, b < 2**32 keeps a * hash inside uint64 before the modulo
+    a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+    signatures = np.full((len(texts), num_perm), _MAX_HASH, dtype=np.uint32)
+    has_shingles = np.zeros(len(texts), dtype=bool)
+    for row, text in enumerate(texts):
+        shingles = _shingles(text, shingle_size)
+        if not shingles:
+            continue
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+        permuted = ((hashes[:, None] * a) % _MERSENNE_PRIME + b) % _MERSENNE_PRIME & _MAX_HASH
+        signatures[row] = permuted.min(axis=0)
+        has_shingles[row] = True
+    return signatures, has_shingles
+
+def near_duplicates(texts, threshold=0.8, num_perm=64, bands=16, shingle_size=2):
+    """
+    MinHash/LSH near-duplicate clustering. Within each band bucket every row is
+    only compared with the bucket's first row, so the work is O(n * bands)
+    rather than quadratic. Pairs are kept when their estimated Jaccard
+    similarity reaches `threshold`. Returns canonical positions like exact_duplicates.
+    """
+    # scipy is only needed for near-duplicates; exact dedup stays import-light
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    n = len(texts)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    rows_per_band = num_perm // bands
+    signatures, has_shingles = minhash_signatures(texts, num_perm, shingle_size)
+    candidates = np.flatnonzero(has_shingles)
+    sources, targets = [], []
+    for band in range(bands):
+        band_sig = np.ascontiguousarray(signatures[candidates, band * rows_per_band:(band + 1) * rows_per_band])
+        keys = band_sig.view(np.dtype((np.void, band_sig.dtype.itemsize * rows_per_band))).ravel()
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        members = candidates
+        representatives = candidates[first[inverse.ravel()]]
+        pair = members != representatives
+        members, representatives = members[pair], representatives[pair]
+        similarity = (signatures[members] == signatures[representatives]).mean(axis=1)
+        keep = similarity >= threshold
+        sources.append(members[keep])
+        targets.append(representatives[keep])
+    sources = np.concatenate(sources)
+    targets = np.concatenate(targets)
+    graph = coo_matrix((np.ones(len(sources), dtype=np.int8), (sources, targets)), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    canonical_of_label = np.full(labels.max() + 1, n, dtype=np.int64)
+    np.minimum.at(canonical_of_label, labels, np.arange(n))
+    return canonical_of_label[labels]
+
+def find_duplicates(texts, near=False, threshold=0.8, num_perm=64, bands=16, shingle_size=2):
+    """
+    Exact duplicates by text, optionally followed by MinHash/LSH near-duplicate
+    clustering of the remaining unique texts. Entry i of the result is the
+    position of the first row in i's cluster.
+    """
+    texts = list(texts)
+    canonical = exact_duplicates(texts)
+    if not near or len(texts) == 0:
+        return canonical
+    unique_rows = np.flatnonzero(canonical == np.arange(len(texts)))
+    near_canonical = near_duplicates([texts[i] for i in unique_rows], threshold, num_perm, bands, shingle_size)
+    lookup = np.arange(len(texts))
+    lookup[unique_rows] = unique_rows[near_canonical]
+    return lookup[canonical]
+
+def assign_duplicate_clusters(df, text_column='hasil normalisasi', near=False, threshold=0.8):
+    """Adds DUPLICATE_COLUMN to df so later stages can score canonical rows once and fan out."""
+    print("Detecting duplicates...")
+    texts = df[text_column].tolist()
+    exact = exact_duplicates(texts)
+    canonical = find_duplicates(texts, near=True, threshold=threshold) if near else exact
+    df[DUPLICATE_COLUMN] = canonical
+    positions = np.arange(len(df))
+    n_exact = int((exact != positions).sum())
+    n_near = int((canonical != positions).sum()) - n_exact
+    print(f"Duplicates: {n_exact} exact, {n_near} near; {int((canonical == positions).sum())} canonical rows of {len(df)}")
+    return df
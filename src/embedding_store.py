@@ -0,0 +1,87 @@
+import os
+import re
+import numpy as np
+from . import config
+from .cache_utils import SqliteCache, text_key
+
+def _model_slug(model_name):
+    return re.sub(r"[^A-Za-z0-9._-]+", "__", model_name)
+
+class EmbeddingStore(SqliteCache):
+    """
+    Append-only float32 embedding matrix, memory-mapped from disk, with a
+    text-hash -> row index in SQLite. There is one pair of files per embedding
+    model, so every distinct text is encoded once across all runs and only
+    texts never seen before reach the encoder.
+    """
+    name = "Embedding store"
+    table = "embeddings"
+    key_column = "text_hash"
+    value_columns = [("row", "INTEGER")]
+
+    def __init__(self, model_name=config.EMBEDDING_MODEL, directory=config.EMBEDDINGS_DIR):
+        base = os.path.join(directory, _model_slug(model_name))
+        self.vectors_path = base + ".f32"
+        super().__init__(base + ".sqlite", model_name)
+        if self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0] == 0:
+            # Fresh or invalidated index: no row points into the old vectors
+            open(self.vectors_path, "wb").close()
+            with self.conn:
+                self.conn.execute("DELETE FROM meta WHERE key = 'dim'")
+
+    @property
+    def dim(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        return int(row[0]) if row else None
+
+    def vectors(self):
+        """Read-only memmap over every stored embedding, indexed by row."""
+        dim = self.dim
+        if dim is None:
+            return np.empty((0, 0), dtype=np.float32)
+        n = os.path.getsize(self.vectors_path) // (4 * dim)
+        if n == 0:
+            return np.empty((0, dim), dtype=np.float32)
+        return np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(n, dim))
+
+    def _append(self, embeddings):
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        dim = self.dim
+        if dim is None:
+            dim = embeddings.shape[1]
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dim', ?)", (str(dim),))
+        elif embeddings.shape[1] != dim:
+            raise ValueError(f"Expected {dim}-dimensional embeddings, got {embeddings.shape[1]}")
+        start = os.path.getsize(self.vectors_path) // (4 * dim)
+        with open(self.vectors_path, "r+b") as f:
+            # Drop a partial row left by an interrupted write before appending
+            f.seek(start * 4 * dim)
+            f.truncate()
+            f.write(embeddings.tobytes())
+        return range(start, start + len(embeddings))
+
+    def embed(self, texts, encode_missing):
+        """
+        Returns a (len(texts), dim) float32 array. Distinct texts absent from
+        the store are passed once, as a list, to `encode_missing`, which must
+        return their embeddings as a 2-D array.
+        """
+        keys = [text_key(text) for text in texts]
+        text_by_key = dict(zip(keys, texts))
+
+        def compute_missing(missing_keys):
+            rows = self._append(encode_missing([text_by_key[key] for key in missing_keys]))
+            return dict(zip(missing_keys, rows))
+
+        found = self.get_or_compute(list(text_by_key), compute_missing)
+        if not keys:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return np.asarray(self.vectors()[[found[key] for key in keys]])
+
+def embed_texts(texts, embedding_model, model_name=config.EMBEDDING_MODEL):
+    """Embeddings of `texts` from the store, encoding only unseen texts with `embedding_model`."""
+    with EmbeddingStore(model_name) as store:
+        embeddings = store.embed(texts, lambda missing: embedding_model.encode(missing, show_progress_bar=False))
+        store.report()
+    return embeddings
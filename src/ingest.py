@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import pandas as pd
+from . import config
+from . import data_loader
+from . import dedup
+from . import token_store
+
+# Text columns that must stay strings when results are read back from CSV
+TEXT_COLUMNS = ['content', 'cleaning', 'casefolding', 'hasil normalisasi', 'stemming']
+
+def load_watermarks():
+    # Watermarks only make sense while the results they describe still exist
+    if not os.path.exists(config.OUTPUT_PREPROCESSED_CSV):
+        return {}
+    try:
+        with open(config.WATERMARKS_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_watermarks(watermarks):
+    os.makedirs(os.path.dirname(config.WATERMARKS_FILE), exist_ok=True)
+    tmp_path = config.WATERMARKS_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(tmp_path, config.WATERMARKS_FILE)
+
+def clear_watermarks():
+    # After a full (non-incremental) rewrite of the results the next incremental run starts over
+    if os.path.exists(config.WATERMARKS_FILE):
+        os.remove(config.WATERMARKS_FILE)
+
+def _row_keys(df):
+    # Native id where the source has one, otherwise a hash of the text
+    content_hashes = df['content'].fillna('').map(lambda text: hashlib.sha1(text.encode('utf-8')).hexdigest())
+    return df['id'].astype('string').fillna(content_hashes).tolist()
+
+def filter_new_rows(df, watermark):
+    """
+    Returns the rows of df newer than `watermark` and the updated watermark.
+    A watermark is the latest created_at seen plus the keys of the rows at
+    exactly that timestamp, so rows sharing the boundary timestamp (e.g.
+    YouTube's day-granular dates) are neither skipped nor processed twice.
+    """
+    dated = df[df['created_at'].notna()]
+    keys = pd.Series(_row_keys(dated), index=dated.index)
+    if watermark:
+        boundary = pd.Timestamp(watermark['created_at'])
+        seen = set(watermark['boundary_keys'])
+        is_new = (dated['created_at'] > boundary) | ((dated['created_at'] == boundary) & ~keys.isin(seen))
+        new_rows = dated[is_new]
+    else:
+        boundary, seen = None, set()
+        new_rows = dated
+    if new_rows.empty:
+        return new_rows, watermark
+
+    latest = new_rows['created_at'].max()
+    latest_keys = set(keys[new_rows.index][new_rows['created_at'] == latest])
+    if boundary is not None and latest == boundary:
+        latest_keys |= seen
+    return new_rows, {'created_at': latest.isoformat(), 'boundary_keys': sorted(latest_keys)}
+
+def load_new_rows():
+    """
+    Loads every registered source adapter and keeps only rows past its
+    watermark. Returns the new rows (unified schema) and the watermarks to
+    save once their results have been written.
+    """
+    print("Loading new rows since the last run...")
+    watermarks = load_watermarks()
+    updated = dict(watermarks)
+    frames = []
+    for name, adapter in data_loader.SOURCE_ADAPTERS.items():
+        if not os.path.exists(adapter.path):
+            print(f"Warning: {adapter.path} not found. Skipping {name}.")
+            continue
+        df = adapter.load()
+        undated = int(df['created_at'].isna().sum())
+        if undated:
+            print(f"Warning: {undated} {name} rows have no timestamp and are skipped.")
+        new_rows, updated[name] = filter_new_rows(df, watermarks.get(name))
+        print(f"{name}: {len(new_rows)} new rows")
+        frames.append(new_rows)
+    if not frames:
+        return pd.DataFrame(columns=data_loader.UNIFIED_COLUMNS), updated
+    df = pd.concat(frames, axis=0, ignore_index=True)
+    df['source'] = df['source'].astype('category')
+    return df, updated
+
+def _publishable(df):
+    # Lean columns decoded; duplicate_of holds row positions that mean nothing once saved
+    return token_store.materialize(df).drop(columns=[dedup.DUPLICATE_COLUMN], errors='ignore')
+
+def save_results(df, path=config.OUTPUT_PREPROCESSED_CSV):
+    """Writes df as the complete results CSV at path, replacing any earlier file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _publishable(df).to_csv(path, index=False)
+
+def append_results(df, path=config.OUTPUT_PREPROCESSED_CSV, replace=False):
+    """
+    Appends a batch of results to the CSV at path, matching its existing header.
+    With replace=True (the batch holds every adapter row because there were no
+    watermarks yet) the file is rewritten instead, so results of an earlier
+    full run are not duplicated.
+    """
+    df = _publishable(df)
+    if os.path.exists(path) and not replace:
+        header = pd.read_csv(path, nrows=0).columns.tolist()
+        missing = [column for column in data_loader.UNIFIED_COLUMNS if column not in header]
+        if missing:
+            raise ValueError(f"{path} has no {', '.join(missing)} columns, so the batch cannot be appended to it. "
+                             f"Delete {config.WATERMARKS_FILE} to rebuild the results from the source adapters.")
+        df.reindex(columns=header).to_csv(path, mode='a', header=False, index=False)
+        print(f"Appended {len(df)} rows to {path}")
+    else:
+        if os.path.exists(path):
+            print(f"No watermarks for {path}. Rewriting it from the source adapter rows.")
+        save_results(df, path)
+        print(f"Wrote {len(df)} rows to {path}")
+
+def load_results(path=config.OUTPUT_PREPROCESSED_CSV):
+    df = pd.read_csv(path)
+    for column in TEXT_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].fillna('')
+    return df
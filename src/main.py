@@ -1,40 +1,138 @@
-import pandas as pd
+import argparse
 import os
 from . import config
 from . import data_loader
+from . import dedup
+from . import ingest
 from . import preprocessing
-from . import sentiment_analysis
-from . import visualization
-from . import topic_modeling
+from . import token_store
 
-def main():
-    print("=== CoreTax Sentiment Analysis Pipeline ===")
-    
+# Pipeline stages in run order. The heavy stage modules (transformers/torch,
+# matplotlib/seaborn, bertopic) are imported only when their stage runs.
+# topic_html renders the BERTopic HTML figures from the saved model.
+STAGES = ['preprocess', 'sentiment', 'visualize', 'topics', 'topic_html']
+
+def run_preprocess_stage():
+    """Loads (new) rows and preprocesses them. Returns the DataFrame and pending watermarks."""
     # 1. Load Data
-    df = data_loader.load_and_merge_data()
-    
+    watermarks = None
+    if config.INCREMENTAL:
+        df, watermarks = ingest.load_new_rows()
+    else:
+        df = data_loader.load_and_merge_data(diagnostics=config.SHOW_DATA_DIAGNOSTICS, raw=config.USE_RAW_SOURCES)
+    if df.empty:
+        return df, watermarks
+
     # 2. Preprocessing
-    df = preprocessing.preprocess_dataframe(df)
-    
+    df = preprocessing.preprocess_dataframe(df, lean=config.LEAN_MODE)
+    return df, watermarks
+
+def run_stream_preprocess_stage():
+    """Preprocess-only run in bounded memory: merged corpus chunks straight to the output CSV."""
+    rows = preprocessing.preprocess_stream(data_loader.iter_merged_chunks(), config.OUTPUT_PREPROCESSING_ONLY_CSV)
+    print(f"Saved {rows} preprocessed rows to {config.OUTPUT_PREPROCESSING_ONLY_CSV}")
+    return rows
+
+def run_sentiment_stage(df, watermarks):
+    from . import sentiment_analysis
+
+    # Duplicate clusters: each cluster is scored once and fanned out
+    df = dedup.assign_duplicate_clusters(df, near=config.NEAR_DUPLICATES, threshold=config.NEAR_DUPLICATE_THRESHOLD)
+
     # 3. Sentiment Analysis
     df = sentiment_analysis.predict_sentiment(df)
-    
+    if config.LEAN_MODE:
+        token_store.compact_categoricals(df)
+
     # Save Preprocessed Results
-    print(f"Saving preprocessed data to {config.OUTPUT_PREPROCESSED_CSV}")
-    df.to_csv(config.OUTPUT_PREPROCESSED_CSV, index=False)
-    
+    if config.INCREMENTAL:
+        # Append the new batch, then continue with the full result set. Without
+        # watermarks the batch is every adapter row and replaces the file.
+        ingest.append_results(df, config.OUTPUT_PREPROCESSED_CSV, replace=not ingest.load_watermarks())
+        ingest.save_watermarks(watermarks)
+        df = ingest.load_results(config.OUTPUT_PREPROCESSED_CSV)
+    else:
+        print(f"Saving preprocessed data to {config.OUTPUT_PREPROCESSED_CSV}")
+        ingest.save_results(df, config.OUTPUT_PREPROCESSED_CSV)
+        # Watermarks describe the previous file; the next incremental run rebuilds from scratch
+        ingest.clear_watermarks()
+    return df
+
+def run_visualize_stage(df):
+    from . import visualization
+    from .term_counts import TermMatrix
+
     # 4. Visualization
     print("Generating visualizations...")
-    visualization.plot_sentiment_distribution(df)
-    visualization.plot_sentiment_by_source(df)
-    visualization.generate_wordclouds(df)
-    visualization.plot_top_words(df)
-    visualization.analyze_tfidf(df)
-    
+    # One document-term matrix shared by every keyword chart
+    terms = TermMatrix.from_df(df)
+    visualization.generate_charts(df, terms)
+
+def run_topics_stage(df):
+    from . import topic_modeling
+
     # 5. Topic Modeling (BERTopic)
     topic_modeling.run_topic_modeling(df)
-    
+
+def run_topic_html_stage():
+    from . import topic_visualization
+
+    # 6. BERTopic HTML figures, rendered from the saved model off the critical path
+    topic_visualization.render_topic_html()
+
+def main(stages=STAGES, stream=config.STREAM_PREPROCESSING):
+    print("=== CoreTax Sentiment Analysis Pipeline ===")
+    # Sentiment scores the freshly preprocessed rows, so it implies preprocessing
+    if 'sentiment' in stages and 'preprocess' not in stages:
+        stages = ['preprocess'] + list(stages)
+
+    if stream and ('sentiment' in stages or config.INCREMENTAL or config.USE_RAW_SOURCES):
+        # The streaming path reads the merged CSVs and never holds the frame sentiment needs
+        print("Streaming only applies to preprocess-only runs on the merged CSVs. Preprocessing in memory.")
+        stream = False
+
+    df = None
+    if 'preprocess' in stages and stream:
+        if run_stream_preprocess_stage() == 0:
+            print("No rows loaded. Nothing to do.")
+            return
+    elif 'preprocess' in stages:
+        df, watermarks = run_preprocess_stage()
+        if df.empty:
+            print("No new rows since the last run. Nothing to do." if config.INCREMENTAL else "No rows loaded. Nothing to do.")
+            return
+        if 'sentiment' in stages:
+            df = run_sentiment_stage(df, watermarks)
+        else:
+            # Without sentiment scores the results file (and watermarks) are left untouched
+            print(f"Saving preprocessing-only output to {config.OUTPUT_PREPROCESSING_ONLY_CSV}")
+            token_store.materialize(df).to_csv(config.OUTPUT_PREPROCESSING_ONLY_CSV, index=False)
+
+    if 'visualize' in stages or 'topics' in stages:
+        if df is None or 'sentiment' not in df.columns:
+            if not os.path.exists(config.OUTPUT_PREPROCESSED_CSV):
+                print(f"{config.OUTPUT_PREPROCESSED_CSV} not found. Run the sentiment stage first.")
+                return
+            print(f"Loading sentiment results from {config.OUTPUT_PREPROCESSED_CSV}")
+            df = ingest.load_results(config.OUTPUT_PREPROCESSED_CSV)
+        if 'visualize' in stages:
+            run_visualize_stage(df)
+        if 'topics' in stages:
+            run_topics_stage(df)
+
+    if 'topic_html' in stages:
+        run_topic_html_stage()
+
     print("=== Pipeline Completed Successfully ===")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="CoreTax sentiment analysis pipeline")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES,
+                        help="Stages to run (default: all). Visualize/topics alone reuse the saved results.")
+    parser.add_argument("--stream", action="store_true", default=config.STREAM_PREPROCESSING,
+                        help="Preprocess-only runs: stream the corpus in chunks instead of loading it whole.")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(args.stages, stream=args.stream)
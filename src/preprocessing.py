@@ -1,16 +1,18 @@
+import json
+import os
 import re
 import string
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import partial
 import pandas as pd
-import nltk
-from nltk.corpus import stopwords
 from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
 from . import config
-
-# Download NLTK data
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
+from . import token_store
+from .cache_utils import file_sha256
+from .stem_cache import StemCache
+from .token_store import TokenStoreBuilder
 
 def remove_punctuation(text):
     if not isinstance(text, str): return ""
@@ -34,41 +36,130 @@ def remove_multiple_whitespace(text):
     text = re.sub('\s+',' ',text)
     return text.translate(str.maketrans("","",string.punctuation))
 
+def _build_cleaning_table():
+    # Derived from the character class and punctuation stripping used in
+    # remove_punctuation so the fused cleaner stays byte-identical to it.
+    strip_punctuation = str.maketrans("", "", string.punctuation)
+    table = {}
+    for code in range(128):
+        char = chr(code)
+        cleaned = re.sub(r"[^A-Za-z0-9^,!.\/'+-=]", " ", char).translate(strip_punctuation)
+        if cleaned != char:
+            table[code] = cleaned or None
+    return table
+
+_NON_ASCII = re.compile(r"[^\x00-\x7f]")
+_UNICODE_ESCAPE = re.compile(r"(\\u[0-9A-Fa-f]+)")
+_NUMBER_OR_SINGLE_CHAR = re.compile(r"\b(?:\d+|[a-zA-Z])\b")
+_MULTIPLE_WHITESPACE = re.compile(r"\s+")
+_CLEANING_TABLE = _build_cleaning_table()
+
+def _replace_number_or_single_char(match):
+    # Numbers become a space (remove_number), single letters vanish (remove_single_char)
+    return " " if match.group()[0].isdigit() else ""
+
+def clean_text(text):
+    """
+    Fused equivalent of remove_punctuation -> remove_number ->
+    remove_single_char -> remove_multiple_whitespace in a single pass.
+    """
+    if not isinstance(text, str): return ""
+    if not text.isascii():
+        text = _NON_ASCII.sub("", text)
+    if "\\u" in text:
+        text = _UNICODE_ESCAPE.sub("", text)
+    text = text.translate(_CLEANING_TABLE)
+    text = _NUMBER_OR_SINGLE_CHAR.sub(_replace_number_or_single_char, text)
+    return _MULTIPLE_WHITESPACE.sub(" ", text)
+
 def case_folding(text):
     if isinstance(text, str):
         return text.lower()
     return text
 
+def is_valid_baku_word(baku_word):
+    return isinstance(baku_word, str) and all(char.isalpha() or char.isspace() for char in baku_word)
+
+def compile_kamus_baku(kamus_data):
+    """
+    Builds the tidak_baku -> kata_baku lookup, dropping entries whose replacement
+    is invalid so that normalization is a plain dict lookup per token.
+    """
+    kamus = dict(zip(kamus_data['tidak_baku'], kamus_data['kata_baku']))
+    return {word: baku_word for word, baku_word in kamus.items()
+            if isinstance(word, str) and is_valid_baku_word(baku_word)}
+
+def _read_kamus_cache():
+    try:
+        with open(config.KAMUS_BAKU_CACHE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def _write_kamus_cache(mtime_ns, sha256, entries):
+    # A unique temp file per writer: concurrent processes compiling a cold cache
+    # each replace the target atomically and the last identical write wins
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(config.KAMUS_BAKU_CACHE_FILE),
+                                    prefix=os.path.basename(config.KAMUS_BAKU_CACHE_FILE), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'source_mtime_ns': mtime_ns, 'source_sha256': sha256, 'entries': entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, config.KAMUS_BAKU_CACHE_FILE)
+    except OSError as e:
+        # The cache is only an optimization; the compiled entries are still returned
+        print(f"Warning: could not write kamus cache ({e}).")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 def load_kamus_baku():
+    """
+    Loads the compiled kamus from the JSON cache next to the xlsx, re-parsing
+    the spreadsheet only when its mtime and content hash have changed.
+    """
     try:
-        kamus_data = pd.read_excel(config.KAMUS_BAKU_FILE)
-        return dict(zip(kamus_data['tidak_baku'], kamus_data['kata_baku']))
+        mtime_ns = os.stat(config.KAMUS_BAKU_FILE).st_mtime_ns
     except FileNotFoundError:
         print(f"Warning: Kamus baku file not found at {config.KAMUS_BAKU_FILE}. Skipping normalization.")
         return {}
+    
+    cached = _read_kamus_cache()
+    if cached is not None and cached.get('source_mtime_ns') == mtime_ns:
+        return cached['entries']
+    
+    # mtime changed (e.g. fresh checkout); only recompile if the content did too
+    sha256 = file_sha256(config.KAMUS_BAKU_FILE)
+    if cached is not None and cached.get('source_sha256') == sha256:
+        entries = cached['entries']
+    else:
+        print("Compiling kamus baku...")
+        entries = compile_kamus_baku(pd.read_excel(config.KAMUS_BAKU_FILE))
+    _write_kamus_cache(mtime_ns, sha256, entries)
+    return entries
 
 def replace_taboo_words(text, kamus_tidak_baku):
+    # kamus_tidak_baku must come from load_kamus_baku/compile_kamus_baku (entries pre-validated)
     if isinstance(text, str):
-        words = text.split()
-        replaced_words = []
-        for word in words:
-            if word in kamus_tidak_baku:
-                baku_word = kamus_tidak_baku[word]
-                if isinstance(baku_word, str) and all(char.isalpha() or char.isspace() for char in baku_word):
-                    replaced_words.append(baku_word)
-                else:
-                    replaced_words.append(word) # Fallback if baku_word is invalid
-            else:
-                replaced_words.append(word)
-        return ' '.join(replaced_words)
+        return ' '.join([kamus_tidak_baku.get(word, word) for word in text.split()])
     return ' '
 
+def normalize_text(text, kamus_tidak_baku):
+    """Cleaning, case folding and normalization of one text ('hasil normalisasi')."""
+    return replace_taboo_words(clean_text(text).lower(), kamus_tidak_baku)
+
 def tokenize(text):
     if isinstance(text, str):
         return text.split()
     return []
 
 def get_stopwords():
+    # NLTK is slow to import, so it is only loaded (and its stopword corpus
+    # downloaded if missing) once stopwords are actually needed
+    import nltk
+    from nltk.corpus import stopwords
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        nltk.download('stopwords')
     stop_words = stopwords.words('indonesian')
     new_stopwords = ["masingmasing", "benarbenar","dgn","gak","ga","ya","nya","yg",
                      "tolong","gabisa","mohon","aja","ngga","banget","udah","nggak",
@@ -85,47 +176,170 @@ def get_stemmer():
     factory = StemmerFactory()
     return factory.create_stemmer()
 
-def preprocess_dataframe(df):
+def stem_unique_terms(terms):
+    stemmer = get_stemmer()
+    return {term: stemmer.stem(term) for term in terms}
+
+def preprocess_texts(contents, kamus_tidak_baku, stop_words):
+    """
+    Runs cleaning, case folding, normalization, tokenizing and stopword removal
+    over a sequence of raw texts. Returns the intermediate columns as lists.
+    """
+    cleaned = [clean_text(text) for text in contents]
+    casefolded = [text.lower() for text in cleaned]
+    normalized = [replace_taboo_words(text, kamus_tidak_baku) for text in casefolded]
+    tokens = [tokenize(text) for text in normalized]
+    return {
+        'cleaning': cleaned,
+        'casefolding': casefolded,
+        'hasil normalisasi': normalized,
+        'tokenize': tokens,
+        'stopword removal': [remove_stopwords_func(t, stop_words) for t in tokens],
+    }
+
+# Per-process resources, loaded once by _init_worker in every pool worker
+_worker_resources = {}
+
+def _init_worker(kamus_tidak_baku):
+    _worker_resources['kamus'] = kamus_tidak_baku
+    _worker_resources['stop_words'] = get_stopwords()
+    _worker_resources['stemmer'] = get_stemmer()
+
+def _preprocess_chunk(contents):
+    return preprocess_texts(contents, _worker_resources['kamus'], _worker_resources['stop_words'])
+
+def _stem_chunk(terms):
+    stemmer = _worker_resources['stemmer']
+    return {term: stemmer.stem(term) for term in terms}
+
+def _split(items, n_chunks):
+    size = max(1, -(-len(items) // n_chunks))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _chunked(items, chunk_size):
+    return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+def _stem_in_pool(executor, n_chunks, terms):
+    term_dict = {}
+    for part in executor.map(_stem_chunk, _split(terms, n_chunks)):
+        term_dict.update(part)
+    return term_dict
+
+def stem_terms(unique_terms, stem_missing, use_stem_cache=True):
+    if not use_stem_cache:
+        return stem_missing(unique_terms)
+    with StemCache() as stem_cache:
+        term_dict = stem_cache.stem_terms(unique_terms, stem_missing)
+        stem_cache.report()
+    return term_dict
+
+def apply_stemming(tokens, term_dict):
+    return ' '.join(term_dict[t] for t in tokens if t in term_dict)
+
+# Rows per chunk in lean mode; bounds how many intermediate lists are alive at once
+LEAN_CHUNK_SIZE = 10000
+INTERMEDIATE_COLUMNS = ['cleaning', 'casefolding', 'hasil normalisasi', 'tokenize', 'stopword removal']
+
+def preprocess_dataframe(df, use_stem_cache=True, workers=1, lean=False):
+    """
+    Runs the full preprocessing pipeline on df['content']. With workers > 1 the
+    rows are split into chunks handled by a process pool (row order preserved)
+    and the unique-term stemming is split across the same pool.
+
+    With lean=True only 'hasil normalisasi' is kept as text; the stemmed tokens
+    are interned into a TokenStore (see token_store.text_column/materialize to
+    get strings back) and 'source' becomes categorical.
+    """
     print("Starting preprocessing...")
+    contents = df['content'].tolist()
     
-    # 1. Cleaning
-    print("Cleaning text...")
-    df["cleaning"] = df['content'].apply(remove_punctuation)
-    df["cleaning"] = df["cleaning"].apply(remove_number)
-    df["cleaning"] = df["cleaning"].apply(remove_single_char)
-    df["cleaning"] = df["cleaning"].apply(remove_multiple_whitespace)
-    
-    # 2. Case Folding
-    print("Case folding...")
-    df['casefolding'] = df['cleaning'].apply(case_folding)
+    with ExitStack() as stack:
+        if workers > 1:
+            print(f"Cleaning, normalizing, tokenizing and removing stopwords with {workers} workers...")
+            # The kamus is loaded (and its cache written) once here, not by every worker
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                               initargs=(load_kamus_baku(),)))
+            # Several chunks per worker keeps the pool balanced when row lengths vary
+            n_chunks = workers * 4
+            parts = executor.map(_preprocess_chunk, _split(contents, n_chunks))
+            stem_missing = partial(_stem_in_pool, executor, n_chunks)
+        else:
+            print("Cleaning, normalizing, tokenizing and removing stopwords...")
+            kamus_tidak_baku, stop_words = load_kamus_baku(), get_stopwords()
+            chunks = _chunked(contents, LEAN_CHUNK_SIZE) if lean else [contents]
+            parts = (preprocess_texts(chunk, kamus_tidak_baku, stop_words) for chunk in chunks)
+            stem_missing = stem_unique_terms
+        
+        if lean:
+            # Keep only what later stages need; intermediate lists die with each chunk
+            normalized = []
+            builder = TokenStoreBuilder()
+            for part in parts:
+                normalized.extend(part['hasil normalisasi'])
+                builder.add(part['stopword removal'])
+            stopword_tokens = builder.build()
+            
+            print("Stemming (this may take a while)...")
+            term_dict = stem_terms(stopword_tokens.vocab, stem_missing, use_stem_cache)
+        else:
+            columns = {}
+            for part in parts:
+                for name, values in part.items():
+                    columns.setdefault(name, []).extend(values)
+            
+            # Optimization: Stem unique terms first, reusing stems persisted by earlier runs
+            print("Stemming (this may take a while)...")
+            unique_terms = list({term for tokens in columns.get('stopword removal', []) for term in tokens})
+            term_dict = stem_terms(unique_terms, stem_missing, use_stem_cache)
     
-    # 3. Normalization
-    print("Normalizing words...")
-    kamus_tidak_baku = load_kamus_baku()
-    df['hasil normalisasi'] = df['casefolding'].apply(lambda x: replace_taboo_words(x, kamus_tidak_baku))
+    if lean:
+        df = df.drop(columns=[c for c in INTERMEDIATE_COLUMNS + ['stemming'] if c in df.columns])
+        df['hasil normalisasi'] = normalized
+        token_store.attach(df, 'stemming', stopword_tokens.map_vocab(term_dict))
+        token_store.compact_categoricals(df)
+    else:
+        for name in INTERMEDIATE_COLUMNS:
+            df[name] = columns.get(name, [])
+        df['stemming'] = [apply_stemming(tokens, term_dict) for tokens in df['stopword removal']]
     
-    # 4. Tokenizing
-    print("Tokenizing...")
-    df['tokenize'] = df['hasil normalisasi'].apply(tokenize)
-    
-    # 5. Stopword Removal
-    print("Removing stopwords...")
-    stop_words = get_stopwords()
-    df['stopword removal'] = df['tokenize'].apply(lambda x: remove_stopwords_func(x, stop_words))
-    
-    # 6. Stemming
-    print("Stemming (this may take a while)...")
+    print("Preprocessing complete.")
+    return df
+
+def preprocess_stream(chunks, output_path, use_stem_cache=True):
+    """
+    Streaming counterpart of preprocess_dataframe: preprocesses an iterable of
+    DataFrame chunks (e.g. data_loader.iter_merged_chunks) one at a time and
+    appends each to the CSV at output_path, so memory is bounded by the chunk
+    size. The written CSV matches preprocess_dataframe's output row for row.
+    Returns the number of rows written.
+    """
+    print("Starting streaming preprocessing...")
+    kamus_tidak_baku, stop_words = load_kamus_baku(), get_stopwords()
     stemmer = get_stemmer()
     
-    # Optimization: Stem unique terms first
-    all_tokens = [term for sublist in df['stopword removal'] for term in sublist]
-    unique_terms = list(set(all_tokens))
-    term_dict = {term: stemmer.stem(term) for term in unique_terms}
+    def stem_missing(terms):
+        return {term: stemmer.stem(term) for term in terms}
     
-    def apply_stemming(tokens):
-        return [term_dict[t] for t in tokens if t in term_dict]
-
-    df['stemming'] = df['stopword removal'].apply(lambda x: ' '.join(apply_stemming(x)))
+    rows = 0
+    with ExitStack() as stack:
+        stem_cache = stack.enter_context(StemCache()) if use_stem_cache else None
+        for chunk in chunks:
+            columns = preprocess_texts(chunk['content'].tolist(), kamus_tidak_baku, stop_words)
+            unique_terms = list({term for tokens in columns['stopword removal'] for term in tokens})
+            if stem_cache is not None:
+                term_dict = stem_cache.stem_terms(unique_terms, stem_missing)
+            else:
+                term_dict = stem_missing(unique_terms)
+            
+            for name in INTERMEDIATE_COLUMNS:
+                chunk[name] = columns[name]
+            chunk['stemming'] = [apply_stemming(tokens, term_dict) for tokens in columns['stopword removal']]
+            chunk.to_csv(output_path, mode='w' if rows == 0 else 'a', header=rows == 0, index=False)
+            rows += len(chunk)
+            print(f"Preprocessed {rows} rows...")
+        if stem_cache is not None:
+            stem_cache.report()
     
-    print("Preprocessing complete.")
-    return df
+    print("Streaming preprocessing complete.")
+    return rows
+
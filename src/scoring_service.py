@@ -0,0 +1,183 @@
+"""
+Long-lived local sentiment scoring service.
+
+Loads the classifier once and serves it over a small HTTP/JSON API:
+
+    POST /score    {"text": "..."} or {"texts": ["...", ...]}, optional "normalize": false
+    GET  /metrics  request/batch counters, batch sizes and p50/p99 latency
+    GET  /health
+
+Concurrent requests are coalesced into micro-batches that are flushed when
+they reach max_batch_size or when the oldest queued text has waited
+max_latency_ms.
+
+Run with: python -m src.scoring_service --port 8765
+"""
+import argparse
+import asyncio
+import json
+import time
+import urllib.request
+from collections import deque
+import numpy as np
+from . import config
+from . import preprocessing
+from . import sentiment_analysis
+
+# Number of recent latencies / batch sizes kept for the metrics endpoint
+METRICS_WINDOW = 10000
+
+class MicroBatcher:
+    def __init__(self, classifier, max_batch_size=config.SENTIMENT_BATCH_SIZE, max_latency_ms=20):
+        self.classifier = classifier
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000
+        self.queue = asyncio.Queue()
+        self.latencies = deque(maxlen=METRICS_WINDOW)
+        self.batch_sizes = deque(maxlen=METRICS_WINDOW)
+        self.requests = 0
+        self.texts = 0
+
+    async def score(self, texts):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            await self.queue.put((text, future))
+            futures.append(future)
+        results = await asyncio.gather(*futures)
+        self.latencies.append(time.perf_counter() - start)
+        self.requests += 1
+        self.texts += len(texts)
+        return results
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_latency
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            texts = [text for text, _ in batch]
+            self.batch_sizes.append(len(batch))
+            # Inference runs in a thread so the event loop keeps accepting requests
+            try:
+                results = await loop.run_in_executor(None, sentiment_analysis.classify_texts, self.classifier, texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), res in zip(batch, results):
+                future.set_result(res)
+
+    def metrics(self):
+        latencies_ms = np.array(self.latencies) * 1000
+        batch_sizes = np.array(self.batch_sizes)
+        return {
+            "requests": self.requests,
+            "texts": self.texts,
+            "batches": len(self.batch_sizes),
+            "batch_size": {
+                "mean": float(batch_sizes.mean()) if len(batch_sizes) else 0.0,
+                "max": int(batch_sizes.max()) if len(batch_sizes) else 0,
+            },
+            "latency_ms": {
+                "p50": float(np.percentile(latencies_ms, 50)) if len(latencies_ms) else 0.0,
+                "p99": float(np.percentile(latencies_ms, 99)) if len(latencies_ms) else 0.0,
+            },
+        }
+
+class ScoringServer:
+    def __init__(self, batcher, kamus_tidak_baku):
+        self.batcher = batcher
+        self.kamus_tidak_baku = kamus_tidak_baku
+
+    async def handle_score(self, body):
+        payload = json.loads(body or b"{}")
+        if not isinstance(payload, dict):
+            raise ValueError("body must be a JSON object")
+        texts = payload["texts"] if "texts" in payload else [payload["text"]]
+        # A bare string would otherwise be scored one character at a time
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise ValueError("texts must be a list of strings")
+        if payload.get("normalize", True):
+            texts = [preprocessing.normalize_text(text, self.kamus_tidak_baku) for text in texts]
+        # Empty texts are not sent to the model, matching predict_sentiment
+        to_score = [text for text in texts if text.strip()]
+        scored = iter(await self.batcher.score(to_score)) if to_score else iter([])
+        return {"results": [next(scored) if text.strip() else {"label": None, "score": None} for text in texts]}
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            method, path = (request_line + ["", ""])[:2]
+            if method == "POST" and path == "/score":
+                status, response = 200, await self.handle_score(body)
+            elif method == "GET" and path == "/metrics":
+                status, response = 200, self.batcher.metrics()
+            elif method == "GET" and path == "/health":
+                status, response = 200, {"status": "ok"}
+            else:
+                status, response = 404, {"error": f"no route for {method} {path}"}
+        except (ValueError, KeyError) as e:
+            status, response = 400, {"error": str(e)}
+        except Exception as e:
+            status, response = 500, {"error": str(e)}
+
+        data = json.dumps(response).encode("utf-8")
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+async def serve(host="127.0.0.1", port=config.SCORING_SERVICE_PORT, max_batch_size=config.SENTIMENT_BATCH_SIZE,
+                max_latency_ms=20, backend=config.SENTIMENT_BACKEND):
+    batcher = MicroBatcher(sentiment_analysis.load_model(backend), max_batch_size, max_latency_ms)
+    server = ScoringServer(batcher, preprocessing.load_kamus_baku())
+    batch_task = asyncio.create_task(batcher.run())
+    http_server = await asyncio.start_server(server.handle, host, port)
+    print(f"Scoring service listening on http://{host}:{port}")
+    try:
+        async with http_server:
+            await http_server.serve_forever()
+    finally:
+        batch_task.cancel()
+
+def request_scores(texts, url=f"http://127.0.0.1:{config.SCORING_SERVICE_PORT}", normalize=True, timeout=30):
+    """Client helper for the dashboard and ad-hoc scripts."""
+    payload = json.dumps({"texts": list(texts), "normalize": normalize}).encode("utf-8")
+    request = urllib.request.Request(f"{url}/score", data=payload, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())["results"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Local CoreTax sentiment scoring service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=config.SCORING_SERVICE_PORT)
+    parser.add_argument("--max-batch-size", type=int, default=config.SENTIMENT_BATCH_SIZE)
+    parser.add_argument("--max-latency-ms", type=float, default=20)
+    parser.add_argument("--backend", choices=sentiment_analysis.BACKENDS, default=config.SENTIMENT_BACKEND)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.max_batch_size, args.max_latency_ms, args.backend))
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,241 @@
-from transformers import pipeline
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
+from . import config
+from . import dedup
+from .sentiment_cache import SentimentCache
 
-def load_model():
-    print("Loading RoBERTa model...")
+BACKENDS = ("pytorch", "onnx", "onnx-int8")
+
+# transformers (and torch behind it) take seconds to import, so they are only
+# imported inside the functions that load or inspect the model
+
+def model_revision(model=config.SENTIMENT_MODEL):
+    """Hub commit hash of the model (falls back to a hash of its config for local models)."""
+    from transformers import AutoConfig
+    model_config = AutoConfig.from_pretrained(model)
+    revision = getattr(model_config, "_commit_hash", None)
+    return revision or hashlib.sha256(model_config.to_json_string().encode("utf-8")).hexdigest()
+
+def export_onnx(quantize=False):
+    """
+    Exports the sentiment model to ONNX (optionally with dynamic int8
+    quantization) under config.ONNX_MODELS_DIR, reusing an earlier export of
+    the same model revision. Returns the export directory and the ONNX file name.
+    """
+    from transformers import AutoTokenizer
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    except ImportError as e:
+        raise ImportError("The ONNX backends need optimum[onnxruntime]: pip install 'optimum[onnxruntime]'") from e
+    
+    export_name = f"{config.SENTIMENT_MODEL.replace('/', '__')}-{model_revision()[:12]}"
+    onnx_dir = os.path.join(config.ONNX_MODELS_DIR, export_name)
+    if not os.path.exists(os.path.join(onnx_dir, "model.onnx")):
+        print(f"Exporting {config.SENTIMENT_MODEL} to ONNX...")
+        model = ORTModelForSequenceClassification.from_pretrained(config.SENTIMENT_MODEL, export=True)
+        model.save_pretrained(onnx_dir)
+        AutoTokenizer.from_pretrained(config.SENTIMENT_MODEL).save_pretrained(onnx_dir)
+    if not quantize:
+        return onnx_dir, "model.onnx"
+    
+    int8_dir = onnx_dir + "-int8"
+    if not os.path.exists(os.path.join(int8_dir, "model_quantized.onnx")):
+        print("Quantizing ONNX model to int8...")
+        quantizer = ORTQuantizer.from_pretrained(onnx_dir)
+        quantizer.quantize(save_dir=int8_dir, quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False))
+        AutoTokenizer.from_pretrained(onnx_dir).save_pretrained(int8_dir)
+    return int8_dir, "model_quantized.onnx"
+
+def load_model(backend=config.SENTIMENT_BACKEND, threads=None):
+    """Builds the classifier pipeline; `threads` pins the intra-op thread count."""
+    from transformers import AutoTokenizer, pipeline
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown sentiment backend {backend!r}; expected one of {BACKENDS}")
+    if backend == "pytorch":
+        if threads is not None:
+            import torch
+            torch.set_num_threads(threads)
+        print("Loading RoBERTa model...")
+        return pipeline(
+            "text-classification",
+            model=config.SENTIMENT_MODEL
+        )
+    
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    model_dir, file_name = export_onnx(quantize=backend == "onnx-int8")
+    session_options = onnxruntime.SessionOptions()
+    if threads is not None:
+        session_options.intra_op_num_threads = threads
+    print(f"Loading RoBERTa model ({backend} backend)...")
     return pipeline(
         "text-classification",
-        model="w11wo/indonesian-roberta-base-sentiment-classifier"
+        model=ORTModelForSequenceClassification.from_pretrained(model_dir, file_name=file_name, session_options=session_options),
+        tokenizer=AutoTokenizer.from_pretrained(model_dir)
     )
 
-def predict_sentiment(df):
-    classifier = load_model()
+# Per-process classifier, loaded once by _init_worker in every pool worker
+_worker_resources = {}
+
+def _init_worker(backend, threads):
+    _worker_resources["classifier"] = load_model(backend, threads)
+
+def _classify_shard(texts):
+    return classify_texts(_worker_resources["classifier"], texts)
+
+def classify_texts_parallel(texts, workers, backend=config.SENTIMENT_BACKEND, threads_per_worker=None):
+    """
+    Shards `texts` across `workers` processes, each holding its own model
+    pinned to `threads_per_worker` threads (default: cores / workers), and
+    returns the results in the original order.
+    """
+    if not texts:
+        return []
+    threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    if backend != "pytorch":
+        # Export once up front instead of racing in every worker
+        export_onnx(quantize=backend == "onnx-int8")
+    # Several shards per worker keeps the pool busy when shard lengths differ
+    shard_size = max(1, -(-len(texts) // (workers * 4)))
+    shards = [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
+    print(f"Classifying {len(texts)} texts with {workers} workers x {threads_per_worker} threads...")
+    # spawn rather than fork: forking after torch has started its thread pools can deadlock
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(backend, threads_per_worker)) as executor:
+        return [res for shard_results in executor.map(_classify_shard, shards) for res in shard_results]
+
+def compare_backends(texts, backend, reference="pytorch"):
+    """
+    Parity check between two backends on `texts`: label agreement, score
+    deltas and throughput of each.
+    """
+    runs = {}
+    for name in (reference, backend):
+        classifier = load_model(name)
+        start = time.perf_counter()
+        runs[name] = (classify_texts(classifier, texts), time.perf_counter() - start)
+    (ref_results, ref_time), (results, run_time) = runs[reference], runs[backend]
+    deltas = np.array([abs(a["score"] - b["score"]) for a, b in zip(ref_results, results)])
+    return {
+        "documents": len(texts),
+        "label_agreement": float(np.mean([a["label"] == b["label"] for a, b in zip(ref_results, results)])),
+        "mean_score_delta": float(deltas.mean()) if len(deltas) else 0.0,
+        "max_score_delta": float(deltas.max()) if len(deltas) else 0.0,
+        f"{reference}_docs_per_sec": len(texts) / ref_time,
+        f"{backend}_docs_per_sec": len(texts) / run_time,
+        "speedup": ref_time / run_time,
+    }
+
+def classify_texts(classifier, texts, batch_size=config.SENTIMENT_BATCH_SIZE, max_length=config.SENTIMENT_MAX_LENGTH):
+    """
+    Runs the classifier in length-bucketed batches: texts are sorted by token
+    count so each batch pads to a similar length, truncated to max_length,
+    and the results are returned in the original order.
+    """
+    if not texts:
+        return []
+    encoded = classifier.tokenizer(texts, truncation=True, max_length=max_length)
+    lengths = [len(ids) for ids in encoded["input_ids"]]
+    order = np.argsort(lengths, kind="stable").tolist()
     
+    results = [None] * len(texts)
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        batch_results = classifier([texts[i] for i in batch], batch_size=len(batch),
+                                   truncation=True, max_length=max_length)
+        for i, res in zip(batch, batch_results):
+            results[i] = res
+    return results
+
+def _is_scorable(text):
+    return isinstance(text, str) and text.strip() != ""
+
+def cascade_training_pairs(cache, texts):
+    """
+    (text, RoBERTa label) pairs for the texts of this corpus and of the
+    previous results that already have a cached RoBERTa result.
+    """
+    candidates = {text for text in texts if _is_scorable(text)}
+    if os.path.exists(config.OUTPUT_PREPROCESSED_CSV):
+        previous = pd.read_csv(config.OUTPUT_PREPROCESSED_CSV, usecols=["hasil normalisasi"])["hasil normalisasi"]
+        candidates.update(text for text in previous.tolist() if _is_scorable(text))
+    candidates = sorted(candidates)
+    return [(text, res["label"]) for text, res in zip(candidates, cache.cached(candidates)) if res is not None]
+
+def _train_cascade(cache, texts):
+    from . import sentiment_cascade
+    pairs = cascade_training_pairs(cache, texts)
+    if len(pairs) < config.CASCADE_MIN_TRAINING_SIZE or len({label for _, label in pairs}) < 2:
+        print(f"Cascade: only {len(pairs)} cached RoBERTa labels to train on. Running RoBERTa on everything.")
+        return None
+    train_texts, labels = zip(*pairs)
+    return sentiment_cascade.train_cascade(list(train_texts), list(labels))
+
+def _classify_with_cascade(model, cache, texts, classify_roberta, threshold):
+    from . import sentiment_cascade
+    # Texts RoBERTa has already scored keep their cached result
+    results = cache.cached(texts)
+    pending = [i for i, res in enumerate(results) if res is None]
+    cascade_results, stats = sentiment_cascade.classify_cascade(
+        model, [texts[i] for i in pending], classify_roberta, threshold)
+    for i, res in zip(pending, cascade_results):
+        results[i] = res
+    print(f"Cascade: {len(texts) - len(pending)} cached, {stats['routed']} of {stats['documents']} new texts "
+          f"({stats['routed_fraction']:.1%}) routed to RoBERTa at margin < {threshold}")
+    return results
+
+def predict_sentiment(df, use_cache=True, backend=config.SENTIMENT_BACKEND, workers=config.SENTIMENT_WORKERS,
+                      cascade=config.SENTIMENT_CASCADE, cascade_threshold=config.CASCADE_MARGIN_THRESHOLD):
     print("Predicting sentiment...")
-    texts = [t for t in df["hasil normalisasi"].tolist() if isinstance(t, str) and t.strip() != ""]
+    texts = df["hasil normalisasi"].tolist()
     
-    # Batch processing could be added here for efficiency, but keeping it simple as per original
-    results = classifier(texts)
+    # Score each duplicate cluster once (exact duplicates at least, or the
+    # clusters from dedup.assign_duplicate_clusters) and fan results back out
+    if dedup.DUPLICATE_COLUMN in df.columns:
+        canonical = df[dedup.DUPLICATE_COLUMN].to_numpy()
+    else:
+        canonical = dedup.exact_duplicates(texts)
+    to_score = [i for i in np.unique(canonical).tolist() if _is_scorable(texts[i])]
+    print(f"Scoring {len(to_score)} unique texts for {len(texts)} rows...")
     
-    # Map results back to DataFrame
-    # Initialize columns
-    df["sentiment"] = None
-    df["score"] = None
+    # The model is only loaded if some texts are not cached yet
+    def classify_missing(missing):
+        if workers > 1:
+            return classify_texts_parallel(missing, workers, backend)
+        return classify_texts(load_model(backend), missing)
     
-    # Create a mapping dictionary for faster lookup if texts are unique, 
-    # but since there might be duplicates, we iterate carefully.
-    # The original code logic:
-    # df.loc[df["hasil normalisasi"].isin(texts), "sentiment"] = [r["label"] for r in results]
-    # This logic in original code has a potential bug if multiple rows have same text but different context (unlikely here)
-    # or if the order isn't preserved perfectly. 
-    # However, we will stick to a safer iteration method.
-    
-    results_iter = iter(results)
+    unique_texts = [texts[i] for i in to_score]
+    if use_cache:
+        # Quantized backends score differently, so each backend has its own cache file
+        with SentimentCache(config.SENTIMENT_MODEL, model_revision(), backend) as cache:
+            # Only RoBERTa results are stored; the cascade's own labels are not cached
+            def classify_roberta(missing):
+                return cache.classify(missing, classify_missing)
+            
+            model = _train_cascade(cache, unique_texts) if cascade else None
+            if model is not None:
+                results = _classify_with_cascade(model, cache, unique_texts, classify_roberta, cascade_threshold)
+            else:
+                results = classify_roberta(unique_texts)
+            cache.report()
+    else:
+        if cascade:
+            print("Cascade: needs the sentiment cache for its training labels. Running RoBERTa on everything.")
+        results = classify_missing(unique_texts)
+    results_by_row = dict(zip(to_score, results))
     
     sentiments = []
     scores = []
     
-    for text in df["hasil normalisasi"]:
-        if isinstance(text, str) and text.strip() != "":
-            res = next(results_iter)
+    for text, row in zip(texts, canonical.tolist()):
+        if _is_scorable(text) and row in results_by_row:
+            res = results_by_row[row]
             sentiments.append(res["label"])
             scores.append(res["score"])
         else:
@@ -0,0 +1,52 @@
+import hashlib
+import os
+from . import config
+from .cache_utils import SqliteCache, text_key
+
+def cache_path(backend):
+    # Quantized backends score differently; each backend keeps its own file so
+    # switching backends never invalidates another backend's results
+    if backend == "pytorch":
+        return config.SENTIMENT_CACHE_FILE
+    root, ext = os.path.splitext(config.SENTIMENT_CACHE_FILE)
+    return f"{root}.{backend}{ext}"
+
+class SentimentCache(SqliteCache):
+    """
+    Persistent (label, score) per normalized-text hash, one file per inference
+    backend. The fingerprint covers the model id, its revision and the
+    truncation length, so the whole cache is invalidated when any of them changes.
+    """
+    name = "Sentiment cache"
+    table = "sentiments"
+    key_column = "text_hash"
+    value_columns = [("label", "TEXT"), ("score", "REAL")]
+
+    def __init__(self, model_id, revision, backend=config.SENTIMENT_BACKEND, max_length=config.SENTIMENT_MAX_LENGTH,
+                 path=None):
+        if path is None:
+            path = cache_path(backend)
+        fingerprint = hashlib.sha256(f"{model_id}|{revision}|{max_length}".encode("utf-8")).hexdigest()
+        super().__init__(path, fingerprint)
+
+    def classify(self, texts, classify_missing):
+        """
+        Returns {"label", "score"} results for `texts` in order. Only texts
+        absent from the cache are passed (as a list) to `classify_missing`,
+        which must return one result dict per text.
+        """
+        keys = [text_key(text) for text in texts]
+        text_by_key = dict(zip(keys, texts))
+
+        def compute_missing(missing_keys):
+            results = classify_missing([text_by_key[key] for key in missing_keys])
+            return {key: (res["label"], res["score"]) for key, res in zip(missing_keys, results)}
+
+        found = self.get_or_compute(list(text_by_key), compute_missing)
+        return [{"label": found[key][0], "score": found[key][1]} for key in keys]
+
+    def cached(self, texts):
+        """Cached result for each of `texts` (None where absent), without counting hits or misses."""
+        keys = [text_key(text) for text in texts]
+        found = self.lookup(list(set(keys)))
+        return [{"label": found[key][0], "score": found[key][1]} if key in found else None for key in keys]
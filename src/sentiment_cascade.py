@@ -0,0 +1,157 @@
+import csv
+import os
+import time
+import urllib.request
+import numpy as np
+from scipy.sparse import csr_matrix, hstack
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from . import config
+
+# Result stage names reported in the cascade stats
+FIRST_STAGE = "lexicon+tfidf"
+SECOND_STAGE = "roberta"
+
+LEXICON_FILES = ("positive.tsv", "negative.tsv")
+
+def fetch_lexicon(lexicon_dir=config.INSET_LEXICON_DIR, base_url=config.INSET_LEXICON_URL):
+    """Downloads the InSet lexicon files into lexicon_dir (the same source the notebook uses)."""
+    os.makedirs(lexicon_dir, exist_ok=True)
+    for file_name in LEXICON_FILES:
+        path = os.path.join(lexicon_dir, file_name)
+        print(f"Downloading {base_url + file_name}...")
+        with urllib.request.urlopen(base_url + file_name, timeout=30) as response:
+            content = response.read()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+def load_lexicon(lexicon_dir=config.INSET_LEXICON_DIR):
+    """
+    Reads the InSet lexicon (positive.tsv and negative.tsv) into a
+    word -> weight dict, downloading it first if it is missing. Words listed
+    in both files get the summed weight. If it cannot be fetched the lexicon
+    is empty and the first stage is TF-IDF only.
+    """
+    if not all(os.path.exists(os.path.join(lexicon_dir, name)) for name in LEXICON_FILES):
+        try:
+            fetch_lexicon(lexicon_dir)
+        except OSError as e:
+            print(f"Warning: InSet lexicon unavailable ({e}). Cascade first stage uses TF-IDF only.")
+            return {}
+    lexicon = {}
+    for file_name in LEXICON_FILES:
+        path = os.path.join(lexicon_dir, file_name)
+        with open(path, encoding="utf-8") as f:
+            for row in csv.reader(f, delimiter="\t"):
+                if len(row) < 2:
+                    continue
+                try:
+                    weight = float(row[1])
+                except ValueError:  # header row
+                    continue
+                lexicon[row[0]] = lexicon.get(row[0], 0.0) + weight
+    return lexicon
+
+def lexicon_features(texts, lexicon):
+    """Per text: log1p of the summed positive and the summed negative lexicon weights."""
+    features = np.zeros((len(texts), 2))
+    for row, text in enumerate(texts):
+        for token in text.split():
+            weight = lexicon.get(token)
+            if weight is not None:
+                features[row, 0 if weight > 0 else 1] += abs(weight)
+    return csr_matrix(np.log1p(features))
+
+class CascadeModel:
+    """First cascade stage: TF-IDF n-grams plus lexicon scores into a logistic regression."""
+
+    def __init__(self, lexicon):
+        self.lexicon = lexicon
+        self.vectorizer = TfidfVectorizer(ngram_range=(1, 2), min_df=2, sublinear_tf=True)
+        self.classifier = LogisticRegression(max_iter=1000, C=4.0)
+
+    def _features(self, texts, fit=False):
+        tfidf = self.vectorizer.fit_transform(texts) if fit else self.vectorizer.transform(texts)
+        return hstack([tfidf, lexicon_features(texts, self.lexicon)]).tocsr()
+
+    def fit(self, texts, labels):
+        self.classifier.fit(self._features(texts, fit=True), labels)
+        return self
+
+    def predict(self, texts):
+        """Returns labels, top probabilities and top-two probability margins."""
+        probabilities = self.classifier.predict_proba(self._features(texts))
+        top_two = np.sort(probabilities, axis=1)[:, -2:]
+        labels = self.classifier.classes_[probabilities.argmax(axis=1)]
+        return labels, top_two[:, 1], top_two[:, 1] - top_two[:, 0]
+
+def train_cascade(texts, labels, lexicon=None):
+    """
+    Trains the first stage on (text, RoBERTa label) pairs and prints, on a 20%
+    held-out split, how many texts each margin threshold would route to RoBERTa
+    and how often the confidently labelled rest agrees with RoBERTa.
+    """
+    lexicon = load_lexicon() if lexicon is None else lexicon
+    print(f"Training cascade first stage on {len(texts)} RoBERTa-labelled texts...")
+    train_texts, test_texts, train_labels, test_labels = train_test_split(
+        texts, labels, test_size=0.2, random_state=42)
+    model = CascadeModel(lexicon).fit(train_texts, train_labels)
+    predicted, _, margins = model.predict(test_texts)
+    correct = predicted == np.asarray(test_labels)
+    print(f"Held-out agreement with RoBERTa: {correct.mean():.2%}")
+    for threshold in (0.2, 0.4, 0.5, 0.6, 0.8):
+        confident = margins >= threshold
+        # Routed texts get the RoBERTa label, so only confident ones can disagree
+        agreement = (correct | ~confident).mean()
+        print(f"  margin >= {threshold:.1f}: {1 - confident.mean():.1%} routed, {agreement:.2%} agreement")
+    return CascadeModel(lexicon).fit(texts, labels)
+
+def classify_cascade(model, texts, classify_uncertain, threshold=config.CASCADE_MARGIN_THRESHOLD):
+    """
+    Labels `texts` with the first stage and passes those with a margin below
+    `threshold` (as a list) to `classify_uncertain`. Returns results in order,
+    each tagged with the stage that produced it, plus routing stats.
+    """
+    if not texts:
+        return [], {"documents": 0, "routed": 0, "routed_fraction": 0.0}
+    start = time.perf_counter()
+    labels, scores, margins = model.predict(texts)
+    first_stage_time = time.perf_counter() - start
+    routed = np.flatnonzero(margins < threshold).tolist()
+    results = [{"label": label, "score": float(score), "stage": FIRST_STAGE}
+               for label, score in zip(labels.tolist(), scores)]
+    start = time.perf_counter()
+    for i, res in zip(routed, classify_uncertain([texts[i] for i in routed])):
+        results[i] = dict(res, stage=SECOND_STAGE)
+    stats = {
+        "documents": len(texts),
+        "routed": len(routed),
+        "routed_fraction": len(routed) / len(texts),
+        "first_stage_seconds": first_stage_time,
+        "second_stage_seconds": time.perf_counter() - start,
+    }
+    return results, stats
+
+def compare_with_baseline(model, texts, classify_all, threshold=config.CASCADE_MARGIN_THRESHOLD):
+    """
+    Runs the cascade and the all-RoBERTa baseline (`classify_all`) on `texts`
+    and reports routed fraction, label agreement and wall-clock speedup.
+    """
+    start = time.perf_counter()
+    baseline = classify_all(texts)
+    baseline_time = time.perf_counter() - start
+    start = time.perf_counter()
+    results, stats = classify_cascade(model, texts, classify_all, threshold)
+    cascade_time = time.perf_counter() - start
+    agreement = np.mean([a["label"] == b["label"] for a, b in zip(baseline, results)]) if texts else 1.0
+    stats.update({
+        "threshold": threshold,
+        "label_agreement": float(agreement),
+        "baseline_seconds": baseline_time,
+        "cascade_seconds": cascade_time,
+        "speedup": baseline_time / cascade_time if cascade_time else float("inf"),
+    })
+    return stats
@@ -0,0 +1,32 @@
+import hashlib
+from importlib import metadata
+from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
+from . import config
+from .cache_utils import SqliteCache
+
+def sastrawi_fingerprint():
+    """Hash of the installed Sastrawi version and its root-word dictionary."""
+    try:
+        version = metadata.version("Sastrawi")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    digest = hashlib.sha256(version.encode("utf-8"))
+    digest.update("\n".join(StemmerFactory().get_words()).encode("utf-8"))
+    return digest.hexdigest()
+
+class StemCache(SqliteCache):
+    """
+    Persistent term -> stem mapping so that only terms never seen in a
+    previous run have to go through the Sastrawi stemmer. Invalidated when the
+    Sastrawi version or root dictionary changes.
+    """
+    name = "Stem cache"
+    table = "stems"
+    key_column = "term"
+    value_columns = [("stem", "TEXT")]
+
+    def __init__(self, path=config.STEM_CACHE_FILE):
+        super().__init__(path, sastrawi_fingerprint())
+
+    def stem_terms(self, terms, stem_missing):
+        return self.get_or_compute(terms, stem_missing)
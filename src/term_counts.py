@@ -0,0 +1,95 @@
+import numpy as np
+from scipy import sparse
+from . import token_store
+from .token_store import TokenStore
+
+class TermMatrix:
+    """
+    Sparse document-term counts (unigrams and bigrams) of a token column, built
+    once per run and shared by every keyword chart. Columns 0..n_unigrams-1 are
+    the unigrams, the rest are bigrams written as "a b".
+    """
+
+    def __init__(self, counts, terms, n_unigrams):
+        self.counts = counts
+        self.terms = np.asarray(terms, dtype=object)
+        self.n_unigrams = n_unigrams
+        self.term_lengths = np.fromiter((len(term) for term in terms), dtype=np.int64, count=len(terms))
+
+    @classmethod
+    def from_store(cls, store, rows=None):
+        """Counts straight from the token ids of a TokenStore, without decoding any strings."""
+        offsets, ids = store.offsets, store.ids
+        if rows is not None:
+            rows = np.asarray(rows, dtype=np.int64)
+            lengths = offsets[rows + 1] - offsets[rows]
+            new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=new_offsets[1:])
+            positions = np.repeat(offsets[rows] - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+            offsets, ids = new_offsets, ids[positions]
+        n_docs = len(offsets) - 1
+        n_vocab = len(store.vocab)
+        doc_of_token = np.repeat(np.arange(n_docs), np.diff(offsets))
+
+        # A bigram is two consecutive ids inside the same document, keyed as a * n_vocab + b
+        same_doc = doc_of_token[:-1] == doc_of_token[1:]
+        pair_keys = ids[:-1][same_doc].astype(np.int64) * n_vocab + ids[1:][same_doc]
+        bigram_keys, bigram_columns = np.unique(pair_keys, return_inverse=True)
+
+        rows_index = np.concatenate([doc_of_token, doc_of_token[:-1][same_doc]])
+        columns = np.concatenate([ids.astype(np.int64), n_vocab + bigram_columns.ravel()])
+        counts = sparse.csr_matrix((np.ones(len(columns), dtype=np.int32), (rows_index, columns)),
+                                   shape=(n_docs, n_vocab + len(bigram_keys)))
+        counts.sum_duplicates()
+        vocab = store.vocab
+        terms = list(vocab) + [f"{vocab[key // n_vocab]} {vocab[key % n_vocab]}" for key in bigram_keys.tolist()]
+        return cls(counts, terms, n_vocab)
+
+    @classmethod
+    def from_texts(cls, texts, tokenize=str.split):
+        return cls.from_store(TokenStore.from_token_lists(
+            tokenize(text) if isinstance(text, str) else [] for text in texts))
+
+    @classmethod
+    def from_df(cls, df, column='stemming'):
+        """Lean frames reuse their TokenStore; string columns are split on whitespace once."""
+        if token_store.is_lean(df, column):
+            return cls.from_store(df.attrs[column], df[token_store.TOKEN_ROW_COLUMN].to_numpy())
+        return cls.from_texts(df[column])
+
+    def total_counts(self):
+        return np.asarray(self.counts.sum(axis=0)).ravel()
+
+    def group_counts(self, labels, groups=None):
+        """Term counts per label value (e.g. sentiment or source) as one sparse row-group sum."""
+        labels = np.asarray(labels, dtype=object)
+        if groups is None:
+            groups = sorted({label for label in labels.tolist() if isinstance(label, str)})
+        group_index = {group: i for i, group in enumerate(groups)}
+        doc_group = np.array([group_index.get(label, -1) for label in labels.tolist()], dtype=np.int64)
+        member = np.flatnonzero(doc_group >= 0)
+        indicator = sparse.csr_matrix((np.ones(len(member), dtype=np.int32), (doc_group[member], member)),
+                                      shape=(len(groups), self.counts.shape[0]))
+        sums = (indicator @ self.counts).toarray()
+        return {group: sums[i] for i, group in enumerate(groups)}
+
+    def columns(self, ngram=None, min_length=0):
+        """Column mask of unigrams (ngram=1), bigrams (ngram=2) or both, keeping terms longer than min_length."""
+        mask = self.term_lengths > min_length
+        if ngram == 1:
+            mask[self.n_unigrams:] = False
+        elif ngram == 2:
+            mask[:self.n_unigrams] = False
+        return mask
+
+    def top_terms(self, counts, k, mask=None):
+        """The k highest-count (term, count) pairs, ranked with argpartition instead of a full sort."""
+        candidates = np.flatnonzero(counts > 0) if mask is None else np.flatnonzero(mask & (counts > 0))
+        if len(candidates) > k:
+            candidates = np.sort(candidates[np.argpartition(-counts[candidates], k - 1)[:k]])
+        candidates = candidates[np.argsort(-counts[candidates], kind='stable')]
+        return [(self.terms[i], counts[i].item()) for i in candidates]
+
+    def frequencies(self, counts, mask=None):
+        columns = np.flatnonzero(counts > 0) if mask is None else np.flatnonzero(mask & (counts > 0))
+        return dict(zip(self.terms[columns].tolist(), counts[columns].tolist()))
@@ -0,0 +1,117 @@
+import sys
+import numpy as np
+import pandas as pd
+
+# Column holding each row's position inside the TokenStore kept in df.attrs
+TOKEN_ROW_COLUMN = 'token_row'
+
+class TokenStore:
+    """
+    Token sequences stored as a shared vocabulary plus a flat int32 array of
+    token ids; row i spans ids[offsets[i]:offsets[i + 1]]. Immutable, so it is
+    shared rather than copied when pandas propagates df.attrs.
+    """
+
+    def __init__(self, vocab, offsets, ids):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.ids = ids
+
+    @classmethod
+    def from_token_lists(cls, token_lists):
+        builder = TokenStoreBuilder()
+        builder.add(token_lists)
+        return builder.build()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __deepcopy__(self, memo):
+        return self
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.ids.nbytes + sum(sys.getsizeof(term) for term in self.vocab)
+
+    def tokens(self, row):
+        return [self.vocab[i] for i in self.ids[self.offsets[row]:self.offsets[row + 1]]]
+
+    def to_strings(self, rows=None, sep=' '):
+        if rows is None:
+            rows = range(len(self))
+        vocab, ids, offsets = self.vocab, self.ids.tolist(), self.offsets.tolist()
+        return [sep.join([vocab[i] for i in ids[offsets[row]:offsets[row + 1]]]) for row in rows]
+
+    def map_vocab(self, term_dict):
+        """Returns a new store with every term replaced by term_dict[term] (e.g. its stem)."""
+        new_vocab = []
+        new_ids = {}
+        mapping = np.empty(len(self.vocab), dtype=np.int32)
+        for old_id, term in enumerate(self.vocab):
+            mapped = term_dict[term]
+            if mapped not in new_ids:
+                new_ids[mapped] = len(new_vocab)
+                new_vocab.append(sys.intern(mapped))
+            mapping[old_id] = new_ids[mapped]
+        return TokenStore(new_vocab, self.offsets, mapping[self.ids])
+
+class TokenStoreBuilder:
+    """Incrementally interns token lists so chunks can be appended as they are produced."""
+
+    def __init__(self):
+        self.vocab = []
+        self.term_ids = {}
+        self.lengths = []
+        self.chunks = []
+
+    def add(self, token_lists):
+        term_ids, vocab = self.term_ids, self.vocab
+        ids = []
+        for tokens in token_lists:
+            for term in tokens:
+                term_id = term_ids.get(term)
+                if term_id is None:
+                    term_id = term_ids[term] = len(vocab)
+                    vocab.append(sys.intern(term))
+                ids.append(term_id)
+            self.lengths.append(len(tokens))
+        self.chunks.append(np.array(ids, dtype=np.int32))
+
+    def build(self):
+        offsets = np.zeros(len(self.lengths) + 1, dtype=np.int64)
+        np.cumsum(self.lengths, out=offsets[1:])
+        ids = np.concatenate(self.chunks) if self.chunks else np.empty(0, dtype=np.int32)
+        return TokenStore(self.vocab, offsets, ids)
+
+def attach(df, column, store):
+    """Stores `column` of df in lean form: the TokenStore goes into df.attrs."""
+    df.attrs[column] = store
+    df[TOKEN_ROW_COLUMN] = np.arange(len(df), dtype=np.int32)
+    return df
+
+def is_lean(df, column):
+    return column not in df.columns and isinstance(df.attrs.get(column), TokenStore)
+
+def text_column(df, column):
+    """Returns `column` as a Series of strings, decoding it from the TokenStore if df is lean."""
+    if not is_lean(df, column):
+        return df[column]
+    store = df.attrs[column]
+    return pd.Series(store.to_strings(df[TOKEN_ROW_COLUMN]), index=df.index, name=column)
+
+def materialize(df, columns=('stemming',)):
+    """Returns a copy of df with lean columns turned back into string columns."""
+    lean_columns = [column for column in columns if is_lean(df, column)]
+    if not lean_columns:
+        return df
+    df = df.assign(**{column: text_column(df, column) for column in lean_columns})
+    df = df.drop(columns=[TOKEN_ROW_COLUMN])
+    for column in lean_columns:
+        df.attrs.pop(column, None)
+    return df
+
+def compact_categoricals(df, columns=('source', 'sentiment')):
+    for column in columns:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    return df
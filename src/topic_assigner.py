@@ -0,0 +1,132 @@
+"""
+Compact topic-assignment artifact and a numpy-only assigner.
+
+export_artifact() writes what labelling needs from a fitted BERTopic model
+to a directory of plain .npy / .json / .csv files (no pickles):
+
+    centroids.npy     float32 (topics x dim), unit-normalized mean embedding per topic
+    topic_ids.npy     topic id of each centroid row
+    ctfidf_*.npy      c-TF-IDF matrix as CSR data / indices / indptr, rows in ctfidf_topic_ids.npy order
+    vocabulary.json   c-TF-IDF column terms
+    labels.csv        topic label table (Topic, Count, Name, words)
+    meta.json         embedding model, dimension and outlier similarity cutoff
+
+TopicAssigner memory-maps the arrays and labels embeddings by batched cosine
+similarity to the centroids, so bulk labelling and the dashboard never
+import bertopic, umap or hdbscan. Documents less similar to their nearest
+centroid than any fitted document was to its own are labelled -1 (outlier).
+"""
+import json
+import os
+import numpy as np
+import pandas as pd
+from . import config
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def export_artifact(topic_model, embeddings, topics, artifact_dir=config.TOPIC_ARTIFACT_DIR,
+                    model_name=config.EMBEDDING_MODEL):
+    """
+    Exports the assignment artifact of a fitted BERTopic model. Centroids are
+    the mean of the (unit-normalized) embeddings of each topic's documents;
+    outliers (-1) get no centroid. Returns a TopicAssigner over the export.
+    """
+    topics = np.asarray(topics)
+    embeddings = _normalize(embeddings)
+    topic_ids = np.array(sorted(set(topics.tolist()) - {-1}), dtype=np.int64)
+    centroids = _normalize(np.stack([embeddings[topics == topic].mean(axis=0) for topic in topic_ids])
+                           if len(topic_ids) else np.empty((0, embeddings.shape[1])))
+    # Outlier cutoff: the lowest cosine between a fitted document and its own topic's centroid
+    in_topic = topics != -1
+    own_centroid = centroids[np.searchsorted(topic_ids, topics[in_topic])]
+    min_similarity = float((embeddings[in_topic] * own_centroid).sum(axis=1).min()) if in_topic.any() else None
+
+    c_tf_idf = topic_model.c_tf_idf_.tocsr()
+    ctfidf_topic_ids = np.array(sorted(topic_model.get_topics()), dtype=np.int64)
+
+    info = topic_model.get_topic_info()
+    labels = pd.DataFrame({
+        "Topic": info["Topic"],
+        "Count": info["Count"],
+        "Name": info["Name"],
+        "words": [" ".join(word for word, _ in (topic_model.get_topic(t) or []) if word) for t in info["Topic"]],
+    })
+
+    os.makedirs(artifact_dir, exist_ok=True)
+    np.save(os.path.join(artifact_dir, "centroids.npy"), centroids)
+    np.save(os.path.join(artifact_dir, "topic_ids.npy"), topic_ids)
+    np.save(os.path.join(artifact_dir, "ctfidf_data.npy"), c_tf_idf.data.astype(np.float32))
+    np.save(os.path.join(artifact_dir, "ctfidf_indices.npy"), c_tf_idf.indices)
+    np.save(os.path.join(artifact_dir, "ctfidf_indptr.npy"), c_tf_idf.indptr)
+    np.save(os.path.join(artifact_dir, "ctfidf_topic_ids.npy"), ctfidf_topic_ids)
+    with open(os.path.join(artifact_dir, "vocabulary.json"), "w", encoding="utf-8") as f:
+        json.dump(topic_model.vectorizer_model.get_feature_names_out().tolist(), f)
+    labels.to_csv(os.path.join(artifact_dir, "labels.csv"), index=False)
+    with open(os.path.join(artifact_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"model": model_name, "dim": int(embeddings.shape[1]), "topics": int(len(topic_ids)),
+                   "min_similarity": min_similarity}, f)
+    print(f"Topic assignment artifact saved to {artifact_dir}")
+    return TopicAssigner(artifact_dir)
+
+class TopicAssigner:
+    """Labels embeddings with the nearest topic centroid; numpy/pandas only."""
+
+    def __init__(self, artifact_dir=config.TOPIC_ARTIFACT_DIR):
+        def load(name):
+            return np.load(os.path.join(artifact_dir, name), mmap_mode="r", allow_pickle=False)
+
+        with open(os.path.join(artifact_dir, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.centroids = load("centroids.npy")
+        self.topic_ids = np.asarray(load("topic_ids.npy"))
+        self.ctfidf_data = load("ctfidf_data.npy")
+        self.ctfidf_indices = load("ctfidf_indices.npy")
+        self.ctfidf_indptr = np.asarray(load("ctfidf_indptr.npy"))
+        self.ctfidf_row = {topic: row for row, topic in enumerate(np.asarray(load("ctfidf_topic_ids.npy")).tolist())}
+        with open(os.path.join(artifact_dir, "vocabulary.json"), encoding="utf-8") as f:
+            self.vocabulary = json.load(f)
+        self.labels = pd.read_csv(os.path.join(artifact_dir, "labels.csv"), keep_default_na=False)
+        # Exported at fit time; None for artifacts without any in-topic document
+        self.min_similarity = self.meta.get("min_similarity")
+
+    def assign(self, embeddings, min_similarity=None, batch_size=config.TOPIC_ASSIGN_BATCH_SIZE):
+        """
+        Topic id per embedding row. Rows whose best cosine similarity is below
+        min_similarity (default: the artifact's fitted cutoff) are labelled -1
+        like BERTopic outliers; min_similarity=-1 gives every row a topic.
+        """
+        if min_similarity is None:
+            min_similarity = self.min_similarity
+        embeddings = np.asarray(embeddings)
+        assigned = np.full(len(embeddings), -1, dtype=np.int64)
+        if len(self.topic_ids) == 0:
+            return assigned
+        centroids = np.asarray(self.centroids)
+        for start in range(0, len(embeddings), batch_size):
+            similarity = _normalize(embeddings[start:start + batch_size]) @ centroids.T
+            best = similarity.argmax(axis=1)
+            batch_topics = self.topic_ids[best]
+            if min_similarity is not None:
+                batch_topics = np.where(similarity[np.arange(len(best)), best] >= min_similarity, batch_topics, -1)
+            assigned[start:start + batch_size] = batch_topics
+        return assigned
+
+    def topic_names(self):
+        names = dict(zip(self.labels["Topic"], self.labels["Name"]))
+        # The fit may have had no outliers even though assign() can produce them
+        names.setdefault(-1, "-1_outlier")
+        return names
+
+    def top_words(self, topic, n=10):
+        """Highest c-TF-IDF terms of a topic with their weights."""
+        row = self.ctfidf_row.get(int(topic))
+        if row is None:
+            return []
+        start, end = self.ctfidf_indptr[row], self.ctfidf_indptr[row + 1]
+        weights = np.asarray(self.ctfidf_data[start:end])
+        columns = np.asarray(self.ctfidf_indices[start:end])
+        order = np.argsort(weights)[::-1][:n]
+        return [(self.vocabulary[columns[i]], float(weights[i])) for i in order]
@@ -2,11 +2,117 @@ from bertopic import BERTopic
 from sentence_transformers import SentenceTransformer
 import pandas as pd
 import os
+from . import ann_index
 from . import config
+from .cache_utils import SqliteCache, text_key
+from .embedding_store import embed_texts
+from .topic_assigner import export_artifact
 
-def run_topic_modeling(df):
+class TopicLedger(SqliteCache):
+    """
+    Hashes of the texts already partial_fit into the online topic model, so
+    each run only feeds the texts it has not seen. Cleared whenever the online
+    model settings change.
+    """
+    name = "Topic model ledger"
+    table = "seen_texts"
+    key_column = "text_hash"
+    value_columns = [("run", "INTEGER")]
+
+    def __init__(self, path=config.TOPIC_LEDGER_FILE):
+        fingerprint = (f"{config.EMBEDDING_MODEL}|{config.TOPIC_ONLINE_CLUSTERS}|"
+                       f"{config.TOPIC_ONLINE_COMPONENTS}|{config.TOPIC_ONLINE_DECAY}")
+        super().__init__(path, fingerprint)
+
+    def unseen(self, texts):
+        key_by_text = {text: text_key(text) for text in texts}
+        seen = self.lookup(list(key_by_text.values()))
+        return [text for text, key in key_by_text.items() if key not in seen]
+
+    def is_empty(self):
+        return self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0] == 0
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute(f"DELETE FROM {self.table}")
+
+    def mark_seen(self, texts):
+        run = self.conn.execute(f"SELECT COALESCE(MAX(run), 0) + 1 FROM {self.table}").fetchone()[0]
+        self.store({text_key(text): run for text in texts})
+
+def _online_model(embedding_model):
+    # Online counterparts of UMAP / HDBSCAN / CountVectorizer: every component
+    # supports partial_fit and MiniBatchKMeans keeps its cluster ids across
+    # batches, so topic ids stay stable from run to run
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.decomposition import IncrementalPCA
+    from bertopic.vectorizers import ClassTfidfTransformer, OnlineCountVectorizer
+    return BERTopic(
+        language="indonesian",
+        embedding_model=embedding_model,
+        umap_model=IncrementalPCA(n_components=config.TOPIC_ONLINE_COMPONENTS),
+        hdbscan_model=MiniBatchKMeans(n_clusters=config.TOPIC_ONLINE_CLUSTERS, random_state=0, n_init=3),
+        vectorizer_model=OnlineCountVectorizer(ngram_range=(1, 2), decay=config.TOPIC_ONLINE_DECAY),
+        ctfidf_model=ClassTfidfTransformer(reduce_frequent_words=True),
+    )
+
+def _batches(texts, batch_size, min_size):
+    # A short tail is folded into the previous batch: IncrementalPCA needs at
+    # least n_components rows per partial_fit call
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    if len(batches) > 1 and len(batches[-1]) < min_size:
+        batches[-2].extend(batches.pop())
+    return batches
+
+def update_online_model(texts, embedding_model):
+    """
+    Loads the saved online topic model (or starts one) and partial_fits only
+    the texts it has not seen before, in batches of TOPIC_ONLINE_BATCH_SIZE.
+    Returns the updated model, or None while no model has been fitted yet.
+    """
+    with TopicLedger() as ledger:
+        topic_model = None
+        if not ledger.is_empty() and os.path.exists(config.OUTPUT_BERTOPIC_MODEL):
+            topic_model = BERTopic.load(config.OUTPUT_BERTOPIC_MODEL, embedding_model=embedding_model)
+            if not hasattr(topic_model.hdbscan_model, "partial_fit"):
+                print("Saved topic model was not fitted online. Starting a new online model.")
+                topic_model = None
+        fitted = topic_model is not None
+        if not fitted:
+            ledger.clear()
+            topic_model = _online_model(embedding_model)
+        # k-means needs at least n_clusters rows in its first batch, PCA n_components in every batch
+        min_new = config.TOPIC_ONLINE_COMPONENTS if fitted else max(config.TOPIC_ONLINE_CLUSTERS, config.TOPIC_ONLINE_COMPONENTS)
+
+        new_texts = ledger.unseen(texts)
+        if len(new_texts) < min_new:
+            print(f"Only {len(new_texts)} new texts (need {min_new}). Topic model update deferred to a later run.")
+            return topic_model if fitted else None
+
+        print(f"Updating online topic model with {len(new_texts)} new texts...")
+        embeddings = embed_texts(new_texts, embedding_model)
+        start = 0
+        batch_size = max(config.TOPIC_ONLINE_BATCH_SIZE, min_new)
+        for batch in _batches(new_texts, batch_size, config.TOPIC_ONLINE_COMPONENTS):
+            topic_model.partial_fit(batch, embeddings=embeddings[start:start + len(batch)])
+            start += len(batch)
+
+        topic_model.save(config.OUTPUT_BERTOPIC_MODEL, serialization="pickle")
+        ledger.mark_seen(new_texts)
+    return topic_model
+
+def run_topic_modeling(df, online=config.TOPIC_ONLINE):
     print("Running BERTopic modeling...")
     
+    embedding_model = SentenceTransformer(config.EMBEDDING_MODEL)
+    
+    if config.BUILD_ANN_INDEX:
+        # The dashboard's similar-comment search covers every sentiment, not just negatives
+        try:
+            ann_index.update_index(df, embedding_model)
+        except ImportError as e:
+            print(f"Warning: {e}. Skipping the similarity index.")
+    
     neg_data = df[df['sentiment'] == 'negative']
     texts = neg_data['hasil normalisasi'].fillna('').tolist()
     
@@ -14,20 +120,33 @@ def run_topic_modeling(df):
         print("No negative sentiment data for topic modeling.")
         return
 
-    embedding_model = SentenceTransformer("distiluse-base-multilingual-cased-v2")
+    if online:
+        topic_model = update_online_model(texts, embedding_model)
+        if topic_model is None:
+            return
+        # Assigning the whole history is a cheap PCA + k-means predict over stored embeddings
+        embeddings = embed_texts(texts, embedding_model)
+        topics, probs = topic_model.transform(texts, embeddings=embeddings)
+        print(topic_model.get_topic_info())
+    else:
+        topic_model = BERTopic(
+            language="indonesian",
+            embedding_model=embedding_model,
+            n_gram_range=(1, 2),
+            min_topic_size=config.TOPIC_MIN_TOPIC_SIZE
+        )
     
-    topic_model = BERTopic(
-        language="indonesian",
-        embedding_model=embedding_model,
-        n_gram_range=(1, 2),
-        min_topic_size=20
-    )
+        # Each distinct text is encoded once, ever; earlier runs' vectors come from the store
+        embeddings = embed_texts(texts, embedding_model)
     
-    topics, probs = topic_model.fit_transform(texts)
-    print(topic_model.get_topic_info())
+        topics, probs = topic_model.fit_transform(texts, embeddings=embeddings)
+        print(topic_model.get_topic_info())
     
-    # Save model
-    topic_model.save(config.OUTPUT_BERTOPIC_MODEL)
+        # Save model
+        topic_model.save(config.OUTPUT_BERTOPIC_MODEL)
+    
+    # Compact centroid/c-TF-IDF export for bulk labelling without bertopic
+    export_artifact(topic_model, embeddings, topics)
     
     # Create results DataFrame
     df_results = pd.DataFrame({
@@ -43,8 +162,3 @@ def run_topic_modeling(df):
     # Save results
     df_results.to_csv(config.OUTPUT_BERTOPIC_CSV, index=False)
     print(f"BERTopic results saved to {config.OUTPUT_BERTOPIC_CSV}")
-    
-    # Visualizations (Saved as HTML)
-    topic_model.visualize_topics().write_html(os.path.join(config.OUTPUTS_DIR, "bertopic_topics.html"))
-    topic_model.visualize_barchart().write_html(os.path.join(config.OUTPUTS_DIR, "bertopic_barchart.html"))
-    topic_model.visualize_hierarchy().write_html(os.path.join(config.OUTPUTS_DIR, "bertopic_hierarchy.html"))
@@ -0,0 +1,152 @@
+"""
+Topic-model hyperparameter sweep.
+
+Embeds the negative comments once (through the embedding store), caches one
+UMAP reduction per UMAP parameter set, then fits BERTopic for every
+combination of min_topic_size, HDBSCAN min_samples and n_gram_range in
+parallel worker processes on the cached reductions. Writes a comparison
+table of topic count, outlier rate and NPMI coherence.
+
+Run with: python -m src.topic_sweep --workers 4
+"""
+import argparse
+import hashlib
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from . import config
+from .cache_utils import text_key
+
+def _reduction_path(texts, n_neighbors, n_components):
+    digest = hashlib.sha256(f"{config.EMBEDDING_MODEL}|{n_neighbors}|{n_components}".encode("utf-8"))
+    for text in texts:
+        digest.update(text_key(text).encode("ascii"))
+    return os.path.join(config.CACHE_DIR, "umap", f"{digest.hexdigest()[:16]}.npy")
+
+def reduce_embeddings(texts, embeddings, n_neighbors, n_components):
+    """UMAP reduction with BERTopic's default settings, cached per corpus and parameter set."""
+    path = _reduction_path(texts, n_neighbors, n_components)
+    if os.path.exists(path):
+        print(f"UMAP (n_neighbors={n_neighbors}, n_components={n_components}): loaded from cache")
+        return np.load(path)
+    from umap import UMAP
+    print(f"UMAP (n_neighbors={n_neighbors}, n_components={n_components}): reducing {len(texts)} embeddings...")
+    reduced = UMAP(n_neighbors=n_neighbors, n_components=n_components, min_dist=0.0,
+                   metric="cosine", random_state=42).fit_transform(embeddings)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path, reduced)
+    return reduced
+
+def npmi_coherence(topic_words, texts, ngram_range):
+    """Mean NPMI over the word pairs of each topic, from document co-occurrence in texts."""
+    from sklearn.feature_extraction.text import CountVectorizer
+    vocabulary = sorted({word for words in topic_words for word in words})
+    if not vocabulary:
+        return float("nan")
+    presence = CountVectorizer(vocabulary=vocabulary, ngram_range=ngram_range, binary=True).transform(texts)
+    n_docs = presence.shape[0]
+    doc_freq = np.asarray(presence.sum(axis=0)).ravel() / n_docs
+    co_freq = (presence.T @ presence).toarray() / n_docs
+    column = {word: i for i, word in enumerate(vocabulary)}
+    scores = []
+    for words in topic_words:
+        pairs = [(column[a], column[b]) for a, b in itertools.combinations(words, 2)]
+        for i, j in pairs:
+            p_ij = co_freq[i, j]
+            if p_ij == 0:
+                scores.append(-1.0)
+            elif p_ij == 1:
+                scores.append(1.0)
+            else:
+                scores.append(np.log(p_ij / (doc_freq[i] * doc_freq[j])) / -np.log(p_ij))
+    return float(np.mean(scores)) if scores else float("nan")
+
+# Per-process sweep inputs, set once by _init_worker in every pool worker
+_worker_resources = {}
+
+def _init_worker(texts, reductions):
+    _worker_resources["texts"] = texts
+    _worker_resources["reductions"] = reductions
+
+def _evaluate(params):
+    from bertopic import BERTopic
+    from bertopic.dimensionality import BaseDimensionalityReduction
+    from hdbscan import HDBSCAN
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    texts = _worker_resources["texts"]
+    reduced = _worker_resources["reductions"][(params["n_neighbors"], params["n_components"])]
+    topic_model = BERTopic(
+        language="indonesian",
+        # The cached reduction is passed as the embeddings and left untouched
+        umap_model=BaseDimensionalityReduction(),
+        hdbscan_model=HDBSCAN(min_cluster_size=params["min_topic_size"], min_samples=params["min_samples"],
+                              metric="euclidean", cluster_selection_method="eom", prediction_data=True),
+        vectorizer_model=CountVectorizer(ngram_range=params["n_gram_range"]),
+        min_topic_size=params["min_topic_size"],
+    )
+    topics, _ = topic_model.fit_transform(texts, embeddings=reduced)
+    topics = np.asarray(topics)
+    # get_topic pads short topics with empty words
+    topic_words = [[word for word, _ in topic_model.get_topic(topic)[:config.SWEEP_COHERENCE_TOP_N] if word]
+                   for topic in sorted(set(topics.tolist()) - {-1})]
+    return dict(params,
+                topics=len(topic_words),
+                outlier_rate=float((topics == -1).mean()),
+                coherence_npmi=npmi_coherence(topic_words, texts, params["n_gram_range"]))
+
+def parameter_grid():
+    return [
+        {"n_neighbors": n_neighbors, "n_components": n_components, "min_topic_size": min_topic_size,
+         "min_samples": min_samples, "n_gram_range": n_gram_range}
+        for n_neighbors, n_components, min_topic_size, min_samples, n_gram_range in itertools.product(
+            config.SWEEP_UMAP_NEIGHBORS, config.SWEEP_UMAP_COMPONENTS, config.SWEEP_MIN_TOPIC_SIZES,
+            config.SWEEP_MIN_SAMPLES, config.SWEEP_NGRAM_RANGES)
+    ]
+
+def run_sweep(df, workers=config.SWEEP_WORKERS, output_path=config.OUTPUT_TOPIC_SWEEP_CSV):
+    """Evaluates parameter_grid() on the negative comments of df and saves the comparison table."""
+    from sentence_transformers import SentenceTransformer
+    from .embedding_store import embed_texts
+
+    texts = df.loc[df["sentiment"] == "negative", "hasil normalisasi"].fillna("").tolist()
+    if not texts:
+        print("No negative sentiment data for the topic sweep.")
+        return None
+    embeddings = embed_texts(texts, SentenceTransformer(config.EMBEDDING_MODEL))
+
+    grid = parameter_grid()
+    reductions = {
+        key: reduce_embeddings(texts, embeddings, *key)
+        for key in dict.fromkeys((params["n_neighbors"], params["n_components"]) for params in grid)
+    }
+
+    print(f"Evaluating {len(grid)} parameter sets with {workers} workers...")
+    if workers > 1:
+        # spawn rather than fork: the embedding model has already started torch's thread pools here
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(texts, reductions)) as executor:
+            rows = list(executor.map(_evaluate, grid))
+    else:
+        _init_worker(texts, reductions)
+        rows = [_evaluate(params) for params in grid]
+
+    table = pd.DataFrame(rows).sort_values("coherence_npmi", ascending=False, ignore_index=True)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    table.to_csv(output_path, index=False)
+    print(table.to_string(index=False))
+    print(f"Topic sweep results saved to {output_path}")
+    return table
+
+def main():
+    parser = argparse.ArgumentParser(description="BERTopic hyperparameter sweep over cached embeddings")
+    parser.add_argument("--workers", type=int, default=config.SWEEP_WORKERS)
+    args = parser.parse_args()
+    from . import ingest
+    run_sweep(ingest.load_results(config.OUTPUT_PREPROCESSED_CSV), workers=args.workers)
+
+if __name__ == "__main__":
+    main()
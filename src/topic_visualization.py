@@ -0,0 +1,111 @@
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from . import config
+from .embedding_store import embed_texts
+from .topic_sweep import reduce_embeddings
+
+# Figure name -> HTML file name read by streamlit_app/pages/visualizations.py
+FIGURES = {
+    "topics": "topics.html",
+    "barchart": "barchart.html",
+    "hierarchy": "hierarchy.html",
+    "heatmap": "heatmap.html",
+    "documents": "documents.html",
+}
+
+def stratified_sample(topics, max_documents=config.TOPIC_DOCUMENTS_SAMPLE,
+                      min_per_topic=config.TOPIC_DOCUMENTS_MIN_PER_TOPIC, seed=42):
+    """
+    Sorted row positions of at most ~max_documents rows. Each topic keeps a
+    share proportional to its size but at least min_per_topic rows (or all of
+    them), so small topics stay visible in the projection.
+    """
+    topics = np.asarray(topics)
+    if len(topics) <= max_documents:
+        return np.arange(len(topics))
+    rng = np.random.RandomState(seed)
+    positions = []
+    for topic, count in zip(*np.unique(topics, return_counts=True)):
+        quota = min(count, max(min_per_topic, int(round(max_documents * count / len(topics)))))
+        positions.append(rng.choice(np.flatnonzero(topics == topic), quota, replace=False))
+    return np.sort(np.concatenate(positions))
+
+class _LazyEncoder:
+    # Only loads the sentence-transformer if some sampled text is not in the embedding store
+    def __init__(self):
+        self.model = None
+
+    def encode(self, texts, show_progress_bar=False):
+        if self.model is None:
+            from sentence_transformers import SentenceTransformer
+            self.model = SentenceTransformer(config.EMBEDDING_MODEL)
+        return self.model.encode(texts, show_progress_bar=show_progress_bar)
+
+def documents_figure(topic_model, texts, topics, embeddings=None):
+    """
+    visualize_documents over a stratified sample, projected with a cached 2-D
+    UMAP of the stored embeddings instead of re-embedding and reducing everything.
+    """
+    sample = stratified_sample(topics)
+    docs = [texts[i] for i in sample]
+    sampled_embeddings = np.asarray(embeddings)[sample] if embeddings is not None else embed_texts(docs, _LazyEncoder())
+    reduced = reduce_embeddings(docs, sampled_embeddings, n_neighbors=15, n_components=2)
+    # visualize_documents reads the topic of each document from topics_
+    all_topics = topic_model.topics_
+    topic_model.topics_ = [int(topics[i]) for i in sample]
+    try:
+        return topic_model.visualize_documents(docs, reduced_embeddings=reduced)
+    finally:
+        topic_model.topics_ = all_topics
+
+# Per-process model and topic assignments, loaded once by _init_worker in every pool worker
+_worker_resources = {}
+
+def _init_worker(model_path, results_path):
+    from bertopic import BERTopic
+    topic_model = BERTopic.load(model_path)
+    results = pd.read_csv(results_path, usecols=["text", "topic"], keep_default_na=False)
+    # Sizes from the saved assignments of every document (an online model's
+    # own topic_sizes_ only covers its last batch)
+    topic_model.topic_sizes_ = Counter(results["topic"].tolist())
+    _worker_resources["topic_model"] = topic_model
+    _worker_resources["texts"] = results["text"].tolist()
+    _worker_resources["topics"] = results["topic"].tolist()
+
+def _render(task):
+    name, output_dir = task
+    topic_model = _worker_resources["topic_model"]
+    try:
+        if name == "documents":
+            fig = documents_figure(topic_model, _worker_resources["texts"], _worker_resources["topics"])
+        else:
+            fig = getattr(topic_model, f"visualize_{name}")()
+    except Exception as e:  # e.g. hierarchy/heatmap need at least two topics
+        return name, None, str(e)
+    path = os.path.join(output_dir, FIGURES[name])
+    fig.write_html(path)
+    return name, path, None
+
+def render_topic_html(model_path=config.OUTPUT_BERTOPIC_MODEL, results_path=config.OUTPUT_BERTOPIC_CSV,
+                      output_dir=config.TOPIC_HTML_DIR, figures=tuple(FIGURES), workers=config.TOPIC_HTML_WORKERS):
+    """Renders the BERTopic HTML figures from the saved model, one figure per task across worker processes."""
+    if not os.path.exists(model_path) or not os.path.exists(results_path):
+        print(f"{model_path} or {results_path} not found. Run the topic modeling stage first.")
+        return
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(name, output_dir) for name in figures]
+    print(f"Rendering {len(tasks)} topic figures with {workers} workers...")
+    if workers > 1:
+        # Every worker loads the model once; spawn avoids forking torch thread pools
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(model_path, results_path)) as executor:
+            results = list(executor.map(_render, tasks))
+    else:
+        _init_worker(model_path, results_path)
+        results = [_render(task) for task in tasks]
+    for name, path, error in results:
+        print(f"  {name}: {path}" if error is None else f"  {name}: skipped ({error})")
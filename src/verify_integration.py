@@ -3,7 +3,10 @@ import pandas as pd
 import numpy as np
 import os
 import re
-from sklearn.feature_extraction.text import CountVectorizer
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.term_counts import TermMatrix
 
 # Define paths
 DATA_PATH = '../data/'
@@ -66,13 +69,16 @@ def clean_text(text):
 
 df_combined['cleaned_text'] = df_combined['text'].apply(clean_text)
 
-# Top Bigrams
-vec = CountVectorizer(ngram_range=(2, 2), stop_words=None).fit(df_combined['cleaned_text'])
-bag_of_words = vec.transform(df_combined['cleaned_text'])
-sum_words = bag_of_words.sum(axis=0)
-words_freq = [(word, sum_words[0, idx]) for word, idx in vec.vocabulary_.items()]
-words_freq = sorted(words_freq, key=lambda x: x[1], reverse=True)
+# Top Bigrams (tokens as CountVectorizer's default pattern: two or more word characters)
+terms = TermMatrix.from_texts(df_combined['cleaned_text'], tokenize=re.compile(r'(?u)\b\w\w+\b').findall)
+bigrams = terms.columns(ngram=2)
 
 print("\nTop 10 Bigrams:")
-for word, freq in words_freq[:10]:
+for word, freq in terms.top_terms(terms.total_counts(), 10, bigrams):
     print(f"{word}: {freq}")
+
+# Per-source counts come from the same matrix
+for source, counts in terms.group_counts(df_combined['source']).items():
+    print(f"\nTop 5 Bigrams - {source}:")
+    for word, freq in terms.top_terms(counts, 5, bigrams):
+        print(f"{word}: {freq}")
@@ -1,33 +1,50 @@
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
-from wordcloud import WordCloud
-from collections import Counter
-from sklearn.feature_extraction.text import TfidfVectorizer
+from wordcloud import WordCloud, STOPWORDS
+from sklearn.feature_extraction.text import TfidfTransformer
+import numpy as np
 import pandas as pd
-import os
 from . import config
+from .chart_rendering import render_charts
+from .term_counts import TermMatrix
 
-def plot_sentiment_distribution(df):
+# Each chart is a pair of functions: *_data(df) aggregates the frame in the main
+# process and plot_*(data) draws a figure from that small result in a worker.
+
+def sentiment_distribution_data(df):
     sentiment_count = df['sentiment'].value_counts()
-    sns.set_style('whitegrid')
-    
+    return {'labels': sentiment_count.index.tolist(), 'counts': sentiment_count.tolist(), 'total': len(df['sentiment'])}
+
+def plot_sentiment_distribution(data):
     fig, ax = plt.subplots(figsize=(8,6))
-    ax = sns.barplot(x=sentiment_count.index, y=sentiment_count.values, palette='viridis')
+    sns.barplot(x=data['labels'], y=data['counts'], palette='viridis', ax=ax)
     
-    plt.title('Sentimen CoreTax', fontsize=14)
-    total = len(df['sentiment'])
+    ax.set_title('Sentimen CoreTax', fontsize=14)
+    total = data['total']
     
-    for i, count in enumerate(sentiment_count.values):
+    for i, count in enumerate(data['counts']):
         percentage = f'{100 * count / total:.2f}%'
         ax.text(i, count + 0.10, f'{count}\n({percentage})', ha='center', va='bottom', fontsize=8)
     
-    plt.savefig(os.path.join(config.OUTPUTS_DIR, 'sentiment_distribution.png'))
-    # plt.show() # Commented out for script execution
+    return fig
+
+def sentiment_by_source_data(df):
+    # Sources and sentiments in order of appearance, like countplot
+    counts = pd.crosstab(df['source'], df['sentiment'])
+    sources = [source for source in pd.unique(df['source'].dropna()) if source in counts.index]
+    sentiments = [sentiment for sentiment in pd.unique(df['sentiment'].dropna()) if sentiment in counts.columns]
+    counts = counts.loc[sources, sentiments]
+    return {'sources': sources, 'sentiments': sentiments, 'counts': counts.values.tolist()}
 
-def plot_sentiment_by_source(df):
-    plt.figure(figsize=(10,6))
-    ax = sns.countplot(data=df, x="source", hue="sentiment", palette="viridis")
-    group_totals = df.groupby("source")["sentiment"].count()
+def plot_sentiment_by_source(data):
+    counts = pd.DataFrame(data['counts'], index=data['sources'], columns=data['sentiments'])
+    long = counts.rename_axis(index='source', columns='sentiment').stack().rename('count').reset_index()
+    fig, ax = plt.subplots(figsize=(10,6))
+    sns.barplot(data=long, x="source", y="count", hue="sentiment", order=data['sources'],
+                hue_order=data['sentiments'], palette="viridis", ax=ax)
+    group_totals = counts.sum(axis=1)
     
     for p in ax.patches:
         height = p.get_height()
@@ -36,29 +53,39 @@ def plot_sentiment_by_source(df):
         x = p.get_x() + p.get_width() / 2
         # Handle potential index error if source not found in labels
         try:
-            source = ax.get_xticklabels()[int(x)].get_text()
+            source = ax.get_xticklabels()[int(round(x))].get_text()
             total = group_totals[source]
             percentage = 100 * height / total
             ax.annotate(f'{percentage:.1f}%', (x, height), ha='center', va='bottom', fontsize=9, color='black')
         except:
             pass
 
-    plt.title("Distribusi Sentiment Setiap Sumber")
-    plt.xlabel("Source")
-    plt.ylabel(" ")
-    plt.tight_layout()
-    plt.savefig(os.path.join(config.OUTPUTS_DIR, 'sentiment_by_source.png'))
+    ax.set_title("Distribusi Sentiment Setiap Sumber")
+    ax.set_xlabel("Source")
+    ax.set_ylabel(" ")
+    fig.tight_layout()
+    return fig
 
-def generate_wordclouds(df):
-    positive_texts = ' '.join(df[df['sentiment'] == 'positive']['stemming'])
-    negative_texts = ' '.join(df[df['sentiment'] == 'negative']['stemming'])
-    neutral_texts = ' '.join(df[df['sentiment'] == 'neutral']['stemming'])
-    
+def sentiment_term_counts(df, terms=None):
+    """Per-sentiment term counts of the shared document-term matrix (built here if not passed)."""
+    if terms is None:
+        terms = TermMatrix.from_df(df)
+    return terms, terms.group_counts(df['sentiment'], groups=['positive', 'negative', 'neutral'])
+
+def wordclouds_data(df, terms=None, max_words=100):
+    terms, counts = sentiment_term_counts(df, terms)
+    # WordCloud.generate() would drop stopwords and numbers while re-tokenizing the text
+    mask = terms.columns(ngram=1) & ~np.isin(terms.terms, list(STOPWORDS))
+    mask &= np.array([not term.isdigit() for term in terms.terms.tolist()], dtype=bool)
+    # Only the max_words most frequent terms are drawn
+    return {sentiment: terms.top_terms(counts[sentiment], max_words, mask) for sentiment in counts}
+
+def plot_wordclouds(data):
     fig, axes = plt.subplots(1, 3, figsize=(24, 7))
     
-    def plot_wc(ax, text, title, cmap):
-        if len(text.strip()) > 0:
-            wc = WordCloud(width=600, height=400, background_color='white', colormap=cmap, max_words=100).generate(text)
+    def plot_wc(ax, frequencies, title, cmap):
+        if frequencies:
+            wc = WordCloud(width=600, height=400, background_color='white', colormap=cmap, max_words=100).generate_from_frequencies(dict(frequencies))
             ax.imshow(wc, interpolation='bilinear')
             ax.set_title(title, fontsize=16)
             ax.axis('off')
@@ -66,28 +93,19 @@ def generate_wordclouds(df):
             ax.text(0.5, 0.5, 'Tidak ada data', ha='center', va='center', fontsize=14)
             ax.axis('off')
 
-    plot_wc(axes[0], positive_texts, 'WordCloud - Sentimen POSITIF', 'Greens')
-    plot_wc(axes[1], negative_texts, 'WordCloud - Sentimen NEGATIF', 'Reds')
-    plot_wc(axes[2], neutral_texts, 'WordCloud - Sentimen NETRAL', 'Greys')
-    
-    plt.tight_layout()
-    plt.savefig(os.path.join(config.OUTPUTS_DIR, 'wordclouds.png'))
-
-def plot_top_words(df):
-    positive_texts = ' '.join(df[df['sentiment'] == 'positive']['stemming'])
-    negative_texts = ' '.join(df[df['sentiment'] == 'negative']['stemming'])
-    neutral_texts = ' '.join(df[df['sentiment'] == 'neutral']['stemming'])
-
-    def get_top_words(text, n=15):
-        if not text or len(text.strip()) == 0: return []
-        words = text.split()
-        words = [w for w in words if len(w) > 3]
-        return Counter(words).most_common(n)
-
-    top_pos = get_top_words(positive_texts)
-    top_neg = get_top_words(negative_texts)
-    top_neu = get_top_words(neutral_texts)
+    plot_wc(axes[0], data['positive'], 'WordCloud - Sentimen POSITIF', 'Greens')
+    plot_wc(axes[1], data['negative'], 'WordCloud - Sentimen NEGATIF', 'Reds')
+    plot_wc(axes[2], data['neutral'], 'WordCloud - Sentimen NETRAL', 'Greys')
     
+    fig.tight_layout()
+    return fig
+
+def top_words_data(df, terms=None, n=15):
+    terms, counts = sentiment_term_counts(df, terms)
+    mask = terms.columns(ngram=1, min_length=3)
+    return {sentiment: terms.top_terms(counts[sentiment], n, mask) for sentiment in counts}
+
+def plot_top_words(data):
     fig, axes = plt.subplots(1, 3, figsize=(22, 6))
     
     def plot_bar(ax, data, title, color):
@@ -102,26 +120,28 @@ def plot_top_words(df):
             ax.text(0.5, 0.5, 'Tidak ada data', ha='center', va='center', fontsize=12)
             ax.set_title(title, fontsize=14)
 
-    plot_bar(axes[0], top_pos, 'Top 15 Kata - Sentimen POSITIF', '#2ecc71')
-    plot_bar(axes[1], top_neg, 'Top 15 Kata - Sentimen NEGATIF', '#e74c3c')
-    plot_bar(axes[2], top_neu, 'Top 15 Kata - Sentimen NETRAL', '#95a5a6')
+    plot_bar(axes[0], data['positive'], 'Top 15 Kata - Sentimen POSITIF', '#2ecc71')
+    plot_bar(axes[1], data['negative'], 'Top 15 Kata - Sentimen NEGATIF', '#e74c3c')
+    plot_bar(axes[2], data['neutral'], 'Top 15 Kata - Sentimen NETRAL', '#95a5a6')
     
-    plt.tight_layout()
-    plt.savefig(os.path.join(config.OUTPUTS_DIR, 'top_words.png'))
+    fig.tight_layout()
+    return fig
 
-def analyze_tfidf(df):
+def tfidf_data(df, terms=None):
     print("Performing TF-IDF Analysis...")
-    df_clean = df.dropna(subset=['stemming'])
-    df_list = df_clean['stemming'].fillna('').tolist()
+    if terms is None:
+        terms = TermMatrix.from_df(df)
     
-    if not df_list:
+    # Same terms as TfidfVectorizer's default tokenizer: unigrams of two or more characters
+    columns = np.flatnonzero(terms.columns(ngram=1, min_length=1))
+    X = terms.counts[:, columns]
+    if X.nnz == 0:
         print("No data for TF-IDF.")
-        return
+        return None
 
-    tfidf_vectorizer = TfidfVectorizer()
-    X = tfidf_vectorizer.fit_transform(df_list)
+    X = TfidfTransformer().fit_transform(X)
     
-    feature_names = tfidf_vectorizer.get_feature_names_out()
+    feature_names = terms.terms[columns]
     tfidf_sums = X.sum(axis=0)
     
     tfidf_df = pd.DataFrame({'term': feature_names, 'tfidf_sum': tfidf_sums.tolist()[0]})
@@ -132,8 +152,29 @@ def analyze_tfidf(df):
     
     # Plot Top 20
     top_20_terms = tfidf_df.head(20)
-    plt.figure(figsize=(8, 6))
-    sns.barplot(x='tfidf_sum', y='term', data=top_20_terms, palette='viridis')
-    plt.title('Top 20 Terms by Total TF-IDF Score', fontsize=14)
-    plt.tight_layout()
-    plt.savefig(os.path.join(config.OUTPUTS_DIR, 'tfidf_ranking.png'))
+    return {'terms': top_20_terms['term'].tolist(), 'tfidf_sums': top_20_terms['tfidf_sum'].tolist()}
+
+def plot_tfidf(data):
+    fig, ax = plt.subplots(figsize=(8, 6))
+    sns.barplot(x=data['tfidf_sums'], y=data['terms'], palette='viridis', ax=ax)
+    ax.set_title('Top 20 Terms by Total TF-IDF Score', fontsize=14)
+    fig.tight_layout()
+    return fig
+
+def chart_specs(df, terms=None):
+    """(file name, draw function, aggregated data) of every static chart of the visualize stage."""
+    if terms is None:
+        terms = TermMatrix.from_df(df)
+    charts = [
+        ('sentiment_distribution.png', plot_sentiment_distribution, sentiment_distribution_data(df)),
+        ('sentiment_by_source.png', plot_sentiment_by_source, sentiment_by_source_data(df)),
+        ('wordclouds.png', plot_wordclouds, wordclouds_data(df, terms)),
+        ('top_words.png', plot_top_words, top_words_data(df, terms)),
+    ]
+    tfidf = tfidf_data(df, terms)
+    if tfidf is not None:
+        charts.append(('tfidf_ranking.png', plot_tfidf, tfidf))
+    return charts
+
+def generate_charts(df, terms=None, output_dir=config.OUTPUTS_DIR, workers=config.CHART_WORKERS, force=False):
+    render_charts(chart_specs(df, terms), output_dir=output_dir, workers=workers, force=force)
@@ -1,5 +1,6 @@
 import streamlit as st
-from utils import load_data, setup_page
+from utils import load_data, load_similarity_index, load_topic_assigner, setup_page
+import pandas as pd
 import plotly.express as px
 
 def show():
@@ -67,10 +68,34 @@ def show():
             
             st.metric("Jumlah Komentar", len(subset))
             
+            assigner = load_topic_assigner()
+            topic_id = str(selected_topic).split('_')[0]
+            if assigner is not None and topic_id.lstrip('-').isdigit():
+                top_words = assigner.top_words(int(topic_id))
+                if top_words:
+                    st.subheader("Kata Kunci Topik (c-TF-IDF)")
+                    st.dataframe(pd.DataFrame(top_words, columns=['Kata', 'Bobot']), use_container_width=True)
+            
             st.subheader("Sampel Komentar")
             for txt in subset['text'].head(5):
                 st.markdown(f"> {txt}")
                 st.markdown("---")
+            
+            similarity_index = load_similarity_index()
+            if similarity_index is not None:
+                st.subheader("Komentar Serupa")
+                sample = st.selectbox("Cari komentar yang mirip dengan:", subset['text'].dropna().head(20).tolist())
+                if sample:
+                    try:
+                        st.dataframe(similarity_index.more_like(sample), use_container_width=True)
+                    except KeyError:
+                        st.info("Komentar ini belum ada di indeks kemiripan.")
+                
+                query = st.text_input("Pencarian bebas di seluruh komentar:")
+                if query:
+                    st.dataframe(similarity_index.search(query), use_container_width=True)
+            else:
+                st.caption("Indeks kemiripan belum tersedia. Jalankan tahap topic modeling untuk membuatnya.")
         else:
             st.warning("Data topik tidak tersedia.")
 
@@ -1,6 +1,10 @@
 import streamlit as st
 import pandas as pd
 import os
+import sys
+
+# Make the pipeline package (src/) importable from the dashboard
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 @st.cache_data
 def load_data():
@@ -18,6 +22,28 @@ def load_data():
         
     return df
 
+@st.cache_resource
+def load_similarity_index():
+    """Loads the HNSW similarity index built by the topic modeling stage (None if unavailable)."""
+    try:
+        from src.ann_index import SimilarityIndex
+        return SimilarityIndex()
+    except (ImportError, FileNotFoundError):
+        return None
+
+@st.cache_resource
+def load_topic_assigner():
+    """
+    Loads the compact topic artifact (numpy only, no bertopic import): the one
+    exported next to the dashboard's topic data, else the pipeline's.
+    """
+    from src import config
+    from src.topic_assigner import TopicAssigner
+    for artifact_dir in ("models/bertopic_model_assigner", config.TOPIC_ARTIFACT_DIR):
+        if os.path.exists(os.path.join(artifact_dir, "meta.json")):
+            return TopicAssigner(artifact_dir)
+    return None
+
 def local_css(file_name):
     """Injects custom CSS from a file."""
     with open(file_name) as f: